@@ -0,0 +1,169 @@
+"""
+In-process media probing for MP4 clips and MP3 narration.
+
+Reads durations straight from container headers so the render pipeline
+doesn't have to spawn ffprobe for every file. Every function returns None
+when it can't make sense of the file, letting callers fall back to ffprobe.
+"""
+import os
+import struct
+from typing import Optional
+
+# Containers whose children are boxes we need to walk into
+MP4_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# MPEG audio Layer III bitrates (kbps) indexed by header bitrate bits
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+
+def _iter_boxes(f, start: int, end: int):
+    """Yield (type, payload_offset, payload_size) for boxes between start and end"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, size - header_size
+        offset += size
+
+def _find_box(f, path: list, start: int, end: int):
+    """Locate the payload of a nested box, e.g. [b'moov', b'mvhd']"""
+    for box_type, payload, size in _iter_boxes(f, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload, size
+            if box_type in MP4_CONTAINER_BOXES:
+                return _find_box(f, path[1:], payload, payload + size)
+    return None
+
+def mp4_duration(path: str) -> Optional[float]:
+    """Read an MP4 file's duration in seconds from its moov/mvhd box"""
+    try:
+        with open(path, "rb") as f:
+            found = _find_box(f, [b"moov", b"mvhd"], 0, os.path.getsize(path))
+            if not found:
+                return None
+            f.seek(found[0])
+            version = f.read(4)[0]
+            if version == 1:
+                timescale, duration = struct.unpack(">16xIQ", f.read(28))
+            else:
+                timescale, duration = struct.unpack(">8xII", f.read(16))
+            return duration / timescale if timescale else None
+    except (OSError, struct.error, IndexError):
+        return None
+
+def mp3_duration(path: str) -> Optional[float]:
+    """Estimate an MP3's duration from its first Layer III frame header"""
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(10)
+            audio_start = 0
+            # Skip an ID3v2 tag (synchsafe size)
+            if head[:3] == b"ID3":
+                tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+                audio_start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+            f.seek(audio_start)
+            data = f.read(4096)
+            for i in range(len(data) - 4):
+                if data[i] == 0xFF and data[i + 1] & 0xE0 == 0xE0:
+                    break
+            else:
+                return None
+
+            header = struct.unpack(">I", data[i:i + 4])[0]
+            version_bits = (header >> 19) & 0x3
+            layer_bits = (header >> 17) & 0x3
+            if version_bits == 1 or layer_bits != 1:
+                return None  # Reserved version or not Layer III
+            version = {3: 1, 2: 2, 0: 2.5}[version_bits]
+            bitrate = MP3_BITRATES[1 if version == 1 else 2][(header >> 12) & 0xF] * 1000
+            sample_rate_index = (header >> 10) & 0x3
+            if not bitrate or sample_rate_index == 3:
+                return None
+            sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+            samples_per_frame = 1152 if version == 1 else 576
+
+            # A Xing/Info header carries the exact frame count (VBR files)
+            mono = (header >> 6) & 0x3 == 3
+            side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+            xing = data[i + 4 + side_info:i + 4 + side_info + 12]
+            if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x1:
+                frames = struct.unpack(">I", xing[8:12])[0]
+                return frames * samples_per_frame / sample_rate
+
+            # Otherwise assume constant bitrate across the audio payload
+            audio_bytes = file_size - (audio_start + i)
+            f.seek(-128, os.SEEK_END)
+            if f.read(3) == b"TAG":
+                audio_bytes -= 128
+            return audio_bytes * 8 / bitrate
+    except (OSError, struct.error, IndexError):
+        return None
+
+def _read_box(f, found) -> bytes:
+    """Read a located box payload (capped, we only need headers)"""
+    offset, size = found
+    f.seek(offset)
+    return f.read(min(size, 4096))
+
+def mp4_video_format(path: str) -> Optional[dict]:
+    """Read codec, decoder config, timescale, frame size and frame rate of an MP4's first video track"""
+    try:
+        with open(path, "rb") as f:
+            moov = _find_box(f, [b"moov"], 0, os.path.getsize(path))
+            if not moov:
+                return None
+            for box_type, trak, trak_size in list(_iter_boxes(f, moov[0], moov[0] + moov[1])):
+                if box_type != b"trak":
+                    continue
+                end = trak + trak_size
+                hdlr = _find_box(f, [b"mdia", b"hdlr"], trak, end)
+                if not hdlr or _read_box(f, hdlr)[8:12] != b"vide":
+                    continue
+
+                mdhd = _read_box(f, _find_box(f, [b"mdia", b"mdhd"], trak, end))
+                timescale = struct.unpack(">I", mdhd[20:24] if mdhd[0] == 1 else mdhd[12:16])[0]
+
+                stsd = _read_box(f, _find_box(f, [b"mdia", b"minf", b"stbl", b"stsd"], trak, end))
+                codec = stsd[12:16].decode("latin-1")
+                width, height = struct.unpack(">HH", stsd[40:44])
+                profile = None
+                codec_config = None
+                if stsd[98:102] == b"avcC":
+                    profile = stsd[103]
+                    # SPS/PPS record; stream-copied clips must share it byte for byte
+                    avcc_size = struct.unpack(">I", stsd[94:98])[0]
+                    codec_config = stsd[102:94 + avcc_size]
+
+                # Constant frame rate clips have a single stts entry
+                stts = _read_box(f, _find_box(f, [b"mdia", b"minf", b"stbl", b"stts"], trak, end))
+                fps = None
+                if struct.unpack(">I", stts[4:8])[0] == 1:
+                    delta = struct.unpack(">I", stts[12:16])[0]
+                    fps = round(timescale / delta, 3) if delta else None
+
+                return {"codec": codec, "profile": profile, "codec_config": codec_config, "timescale": timescale,
+                        "width": width, "height": height, "fps": fps}
+    except (OSError, struct.error, IndexError, TypeError):
+        return None
+    return None
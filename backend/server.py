@@ -1,34 +1,54 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import re
 import uuid
-from typing import Optional
+import random
+import hashlib
+from typing import List, Optional
 from pydantic import BaseModel
 import openai
-import requests
-from elevenlabs.client import ElevenLabs
-from elevenlabs import VoiceSettings
+import httpx
 import aiofiles
 from dotenv import load_dotenv
 import asyncio
 import threading
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from cachetools import TTLCache
+import orjson
+import subprocess
 import time
+from datetime import datetime, timezone
 import tempfile
 import shutil
 from pathlib import Path
+from media_probe import mp4_duration, mp3_duration, mp4_video_format
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+# orjson encodes the large script/metadata payloads several times faster than json.dumps
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Startup event to clear any cached error states
 @app.on_event("startup")
 async def startup_event():
+    global main_loop
+    main_loop = asyncio.get_running_loop()
     clear_video_status()
+    app.state.cache_sweeper = asyncio.create_task(sweep_content_cache_periodically())
+    await warm_connection_pools()
+
+# Shutdown event to release pooled HTTP connections and queued renders
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.cache_sweeper.cancel()
+    await http_client.aclose()
+    await pexels_client.aclose()
+    video_executor.shutdown(wait=False, cancel_futures=True)
 
 # Configure CORS
 app.add_middleware(
@@ -39,100 +59,308 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# OpenAI failures map to the same responses from every endpoint
+@app.exception_handler(openai.APITimeoutError)
+async def openai_timeout_handler(request: Request, exc: openai.APITimeoutError):
+    return ORJSONResponse(status_code=408, content={"detail": "OpenAI request timed out. Please try again, or reduce the requested duration."})
+
+@app.exception_handler(openai.APIError)
+async def openai_error_handler(request: Request, exc: openai.APIError):
+    return ORJSONResponse(status_code=500, content={"detail": f"OpenAI API error: {str(exc)}"})
+
 # Initialize AI clients
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 PEXELS_API_KEY = os.getenv('PEXELS_API_KEY')
 
-# Initialize OpenAI client
-openai_client = openai.OpenAI(
+# Pexels auth is sent as a default header on every request from pexels_client
+PEXELS_HEADERS = {"Authorization": PEXELS_API_KEY} if PEXELS_API_KEY else {}
+if not PEXELS_API_KEY:
+    print("PEXELS_API_KEY is not set - stock footage searches will be rejected")
+
+# Shared HTTP/2 client: pooled connections for OpenAI, ElevenLabs and image/clip downloads
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=120)
+)
+
+# Initialize OpenAI client (async, one instance on the shared connection pool).
+# The SDK retries 429s and 5xx with exponential backoff, honouring Retry-After.
+OPENAI_MAX_RETRIES = 4
+async_openai_client = openai.AsyncOpenAI(
     api_key=OPENAI_API_KEY,
-    timeout=120  # 2 minutes timeout
+    timeout=120,  # 2 minutes timeout
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=http_client
 )
 
-# Initialize ElevenLabs client
-elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+# Cap in-flight OpenAI calls so a burst of generations can't tie up every worker
+# or turn into a wall of 429s
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
 
-# Create directories for file storage
-os.makedirs("generated_content", exist_ok=True)
-os.makedirs("generated_content/scripts", exist_ok=True)
-os.makedirs("generated_content/audio", exist_ok=True)
-os.makedirs("generated_content/thumbnails", exist_ok=True)
-os.makedirs("generated_content/videos", exist_ok=True)
-os.makedirs("generated_content/status", exist_ok=True)
-os.makedirs("generated_content/temp_videos", exist_ok=True)
+# ElevenLabs client (async, on the shared connection pool). The SDK takes a noticeable
+# share of import time, so it's loaded on the first voice request instead of at startup.
+async_elevenlabs_client = None
 
-# Mount static files
-app.mount("/generated_content", StaticFiles(directory="generated_content"), name="generated_content")
+# ElevenLabs allows only a few concurrent TTS streams per plan; queue beyond that
+# instead of collecting 429s
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "5"))
+elevenlabs_semaphore = asyncio.Semaphore(ELEVENLABS_MAX_CONCURRENCY)
 
-class VideoRequest(BaseModel):
-    topic: str
-    duration_minutes: Optional[int] = 12
+def get_elevenlabs_client():
+    """Create the ElevenLabs client on first use"""
+    global async_elevenlabs_client
+    if async_elevenlabs_client is None:
+        from elevenlabs.client import AsyncElevenLabs
+        async_elevenlabs_client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY, httpx_client=http_client)
+    return async_elevenlabs_client
 
-class VideoResponse(BaseModel):
-    video_id: str
-    status: str
-    message: str
+# OpenAI retries inside its SDK; ElevenLabs, Pexels and clip downloads go through
+# with_backoff so a 429 or a dropped connection is retried instead of becoming a 500
+PROVIDER_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+PROVIDER_MAX_ATTEMPTS = 5
+PROVIDER_BACKOFF_MAX = 30  # seconds
 
-@app.get("/api/health")
-async def health_check():
-    return {"status": "healthy", "message": "AI YouTube Generator API is running"}
+def is_transient_error(exc: Exception) -> bool:
+    """True for connection failures and retryable HTTP statuses from any provider"""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in PROVIDER_RETRY_STATUSES
+    # ElevenLabs' ApiError carries the status directly
+    return getattr(exc, "status_code", None) in PROVIDER_RETRY_STATUSES
 
-@app.post("/api/test-integrations")
-async def test_ai_integrations():
-    """Test all AI service integrations"""
-    results = {}
-    
-    # Test OpenAI
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "Say 'OpenAI integration working!'"}],
-            max_tokens=10
-        )
-        results["openai"] = {"status": "success", "response": response.choices[0].message.content}
-    except Exception as e:
-        results["openai"] = {"status": "error", "error": str(e)}
-    
-    # Test ElevenLabs
-    try:
-        # Test text-to-speech instead of voices list (doesn't require voices_read permission)
-        audio = elevenlabs_client.text_to_speech.convert(
-            voice_id="pNInz6obpgDQGcFmaJgB",  # Adam voice ID
-            text="ElevenLabs integration test",
-            output_format="mp3_22050_32"
-        )
-        # Just check if we can create the audio object without saving
-        audio_data = b"".join(audio)
-        results["elevenlabs"] = {"status": "success", "audio_bytes": len(audio_data)}
-    except Exception as e:
-        results["elevenlabs"] = {"status": "error", "error": str(e)}
-    
-    # Test Pexels
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before the next attempt: Retry-After if given, else full-jitter exponential"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), PROVIDER_BACKOFF_MAX)
+    return random.uniform(0, min(PROVIDER_BACKOFF_MAX, 2 ** attempt))
+
+async def with_backoff(call, attempts: int = PROVIDER_MAX_ATTEMPTS):
+    """Await call(), retrying transient provider failures; anything else raises at once"""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient_error(e):
+                raise
+            print(f"Transient provider error (attempt {attempt + 1}/{attempts}): {e}")
+            await asyncio.sleep(backoff_delay(attempt))
+
+# Dedicated keep-alive client for the Pexels API with auth preset
+pexels_client = httpx.AsyncClient(
+    base_url="https://api.pexels.com",
+    headers=PEXELS_HEADERS,
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120)
+)
+
+# Cap in-flight Pexels API calls so bursts of renders don't trip their rate limit
+PEXELS_MAX_CONCURRENCY = int(os.getenv("PEXELS_MAX_CONCURRENCY", "10"))
+pexels_semaphore = asyncio.Semaphore(PEXELS_MAX_CONCURRENCY)
+
+async def pexels_get(path: str, **kwargs) -> httpx.Response:
+    """GET a Pexels API path through the shared client, bounded by pexels_semaphore.
+    Rate limits and 5xx are retried with backoff; the last response is returned as-is."""
+    for attempt in range(PROVIDER_MAX_ATTEMPTS):
+        # Hold the semaphore per attempt so backing-off callers don't block others
+        async with pexels_semaphore:
+            try:
+                response = await pexels_client.get(path, **kwargs)
+            except httpx.TransportError:
+                if attempt == PROVIDER_MAX_ATTEMPTS - 1:
+                    raise
+                response = None
+        if response is not None and (response.status_code not in PROVIDER_RETRY_STATUSES or attempt == PROVIDER_MAX_ATTEMPTS - 1):
+            return response
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+async def search_pexels_videos(topic: str, count: int) -> httpx.Response:
+    """Search Pexels videos; httpx percent-encodes the query so '&', '=' or unicode topics stay intact"""
+    params = {"query": " ".join(topic.split()), "per_page": count, "size": "medium"}
+    return await pexels_get("/videos/search", params=params)
+
+async def warm_connection_pools():
+    """Open DNS/TLS sessions to the hot API hosts so the first real request skips the handshake"""
+    # Auth failures are fine here - the handshake is what we want
+    results = await asyncio.gather(
+        http_client.head("https://api.openai.com/v1/models", timeout=5),
+        http_client.head("https://api.elevenlabs.io/v1/voices", timeout=5),
+        pexels_client.head("/v1/search", params={"query": "x", "per_page": 1}, timeout=5),
+        return_exceptions=True
+    )
+    for host, result in zip(("openai", "elevenlabs", "pexels"), results):
+        if isinstance(result, Exception):
+            print(f"Connection warm-up to {host} failed: {result}")
+
+# Create directories for file storage (parents=True covers generated_content itself).
+# importlib.reload keeps module globals, so reloads see the sentinel and skip the mkdirs.
+CONTENT_ROOT = Path("generated_content")
+GENERATED_CONTENT_DIRS = [
+    CONTENT_ROOT / name
+    for name in ("scripts", "audio", "thumbnails", "videos", "status", "temp_videos", "cache")
+]
+if not globals().get("generated_content_ready"):
+    for directory in GENERATED_CONTENT_DIRS:
+        directory.mkdir(parents=True, exist_ok=True)
+    generated_content_ready = True
+
+# Generated scripts and thumbnails are reused for repeat topics for up to a week.
+# Bump a prompt version whenever its template changes so stale outputs aren't served.
+CONTENT_CACHE_DIR = str(CONTENT_ROOT / "cache")
+CONTENT_CACHE_TTL = 7 * 24 * 60 * 60
+SCRIPT_PROMPT_VERSION = "v1"
+THUMBNAIL_PROMPT_VERSION = "v1"
+METADATA_PROMPT_VERSION = "v1"
+VOICE_SETTINGS_VERSION = "v1"
+CONTENT_CACHE_SWEEP_INTERVAL = 24 * 60 * 60
+
+def content_cache_path(kind: str, extension: str, *key_parts) -> str:
+    """Cache file path for a SHA-256 of the inputs that determine the output"""
+    key = hashlib.sha256("|".join(str(part) for part in key_parts).encode()).hexdigest()
+    return f"{CONTENT_CACHE_DIR}/{kind}-{key}.{extension}"
+
+def normalize_topic(topic: str) -> str:
+    """Cache-key form of a topic, so case, spacing and trailing punctuation variants share an entry"""
+    return " ".join(topic.split()).casefold().rstrip(".!?")
+
+# Hit/miss counts since startup, reported by /api/cache-stats
+content_cache_stats = {"hits": 0, "misses": 0}
+
+def read_content_cache(cache_path: str) -> Optional[str]:
+    """Return the cache path if it holds a fresh entry, dropping expired ones"""
     try:
-        headers = {"Authorization": PEXELS_API_KEY}
-        response = requests.get("https://api.pexels.com/v1/search?query=test&per_page=1", headers=headers)
-        if response.status_code == 200:
-            results["pexels"] = {"status": "success", "photos_found": len(response.json().get("photos", []))}
-        else:
-            results["pexels"] = {"status": "error", "error": f"HTTP {response.status_code}"}
-    except Exception as e:
-        results["pexels"] = {"status": "error", "error": str(e)}
+        age = time.time() - os.stat(cache_path).st_mtime
+    except FileNotFoundError:
+        content_cache_stats["misses"] += 1
+        return None
     
-    return results
+    if age > CONTENT_CACHE_TTL:
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+        content_cache_stats["misses"] += 1
+        return None
+    content_cache_stats["hits"] += 1
+    return cache_path
 
-@app.post("/api/generate-script")
-async def generate_script(request: VideoRequest):
-    """Generate a YouTube video script using OpenAI GPT-4"""
+def link_or_copy(src: str, dst: str):
+    """Hardlink a generated file into place, copying when links aren't supported"""
     try:
-        # Calculate word target based on duration (approximately 150 words per minute)
-        word_target = max(150, request.duration_minutes * 150)
-        
-        prompt = f"""
-        Create a compelling, engaging YouTube video script about "{request.topic}" that will be exactly {request.duration_minutes} minutes long.
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def restore_from_cache(cache_path: str, dst: str):
+    """Atomically place a cached file at dst, replacing whatever was there"""
+    tmp_path = f"{dst}.{uuid.uuid4().hex}.tmp"
+    link_or_copy(cache_path, tmp_path)
+    os.replace(tmp_path, dst)
+
+def write_content_cache(src: str, cache_path: str):
+    """Atomically publish a generated file as the cache entry"""
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    link_or_copy(src, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+# Cache keys being generated right now -> future resolved when that generation ends.
+# Identical requests arriving meanwhile wait for it and then read the cache.
+inflight_generations = {}
+
+async def lookup_or_claim(cache_path: str) -> bool:
+    """True on a cache hit; otherwise claim the key so identical concurrent requests wait on us"""
+    while True:
+        if await asyncio.to_thread(read_content_cache, cache_path):
+            return True
+        running = inflight_generations.get(cache_path)
+        if running is None:
+            inflight_generations[cache_path] = asyncio.get_running_loop().create_future()
+            return False
+        await asyncio.shield(running)  # Leader finished (or failed) - look again
+
+def release_generation(cache_path: str):
+    """Wake requests waiting on a claimed cache key"""
+    waiter = inflight_generations.pop(cache_path, None)
+    if waiter is not None and not waiter.done():
+        waiter.set_result(None)
+
+def write_content_cache_text(text: str, cache_path: str):
+    """Atomically store a generated text response as the cache entry"""
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+
+def sweep_content_cache() -> int:
+    """Delete expired cache entries and temp files left behind by interrupted writes"""
+    now = time.time()
+    removed = 0
+    with os.scandir(CONTENT_CACHE_DIR) as entries:
+        for entry in entries:
+            try:
+                age = now - entry.stat().st_mtime
+                ttl = 60 * 60 if entry.name.endswith(".tmp") else CONTENT_CACHE_TTL
+                if age > ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+async def sweep_content_cache_periodically():
+    """Run the content cache sweep once a day for the life of the server"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(sweep_content_cache)
+            if removed:
+                print(f"Content cache sweep removed {removed} expired files")
+        except Exception as e:
+            print(f"Content cache sweep failed: {e}")
+        await asyncio.sleep(CONTENT_CACHE_SWEEP_INTERVAL)
+
+# Mount static files
+app.mount("/generated_content", StaticFiles(directory=CONTENT_ROOT), name="generated_content")
+
+# Narration voice (ElevenLabs "Adam" unless overridden)
+VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "pNInz6obpgDQGcFmaJgB")
+
+@lru_cache(maxsize=1)
+def narration_voice_settings():
+    """Voice settings for narration, built once on first use (the SDK is imported lazily)"""
+    from elevenlabs import VoiceSettings
+    return VoiceSettings(
+        stability=0.71,
+        similarity_boost=0.5,
+        style=0.0,
+        use_speaker_boost=True
+    )
+
+# Streamed TTS audio is flushed to disk in batches of this size
+AUDIO_WRITE_BATCH_BYTES = 64 * 1024
+
+# Streamed script tokens are appended to disk every this many deltas
+SCRIPT_WRITE_BATCH_DELTAS = 64
+
+# Script markers stripped before voice synthesis, in a single pass. Whole markers are
+# matched so timestamps aren't read aloud and ordinary ']' in the text survives.
+SCRIPT_MARKER_RE = re.compile(r'\[TIMESTAMP:[^\]]*\]|\[PAUSE\]|\[/?EMPHASIS\]')
+SCRIPT_MARKER_REPLACEMENTS = {'[PAUSE]': '... '}
+
+def clean_script_for_voice(script_content: str) -> str:
+    """Remove script markers, turning pauses into ellipses"""
+    return SCRIPT_MARKER_RE.sub(lambda m: SCRIPT_MARKER_REPLACEMENTS.get(m.group(0), ''), script_content)
+
+# Prompt templates, filled with str.format at request time
+SCRIPT_PROMPT_TEMPLATE = """
+        Create a compelling, engaging YouTube video script about "{topic}" that will be exactly {duration_minutes} minutes long.
         
         Requirements:
-        - Write approximately {word_target} words ({request.duration_minutes} minutes of content)
+        - Write approximately {word_target} words ({duration_minutes} minutes of content)
         - Include a strong hook in the first 15 seconds
         - Use storytelling techniques to maintain engagement
         - Write in a conversational, engaging tone for voiceover narration
@@ -151,32 +379,248 @@ async def generate_script(request: VideoRequest):
         - Avoid brackets, parentheses, or special formatting
         - Make it sound natural for AI voice generation
         
-        Topic: {request.topic}
-        Duration: {request.duration_minutes} minutes
+        Topic: {topic}
+        Duration: {duration_minutes} minutes
         
         Generate ONLY the spoken script content - nothing else.
         """
+
+THUMBNAIL_PROMPT_TEMPLATE = """
+        Create a highly engaging, professional YouTube thumbnail image for a video about "{topic}".
         
-        # Use different models based on content length for better performance
-        model = "gpt-4o-mini" if request.duration_minutes <= 5 else "gpt-4o"
-        max_tokens = min(4000, word_target + 500)  # Dynamic token limit
-        timeout = min(180, 30 + (request.duration_minutes * 10))  # Dynamic timeout
-        
-        response = openai_client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=max_tokens,
-            temperature=0.7,
-            timeout=timeout
-        )
+        CRITICAL REQUIREMENTS:
+        - NO TEXT OR WORDS in the image at all
+        - NO letters, numbers, or written content
+        - Focus on powerful visual imagery only
+        - Dramatic, cinematic composition
+        - High contrast and vibrant colors
+        - Professional photography style
+        - Should evoke strong emotion and curiosity
+        - Optimized for YouTube thumbnail format
+        - Dark, mysterious atmosphere if the topic is serious
+        - Bright, energetic if the topic is upbeat
         
-        script_content = response.choices[0].message.content
-        script_id = str(uuid.uuid4())
+        Style: Professional digital art, photorealistic, movie poster quality, no text overlay.
+        """
+
+METADATA_PROMPT_TEMPLATE = """
+        Create optimized YouTube metadata for a video about "{topic}".
+        
+        Generate:
+        1. 3 high-CTR title variations (60 characters max each)
+        2. A detailed description (200+ words) with:
+           - Engaging opening
+           - Key points covered
+           - Relevant hashtags
+           - Call to action
+        3. 10-15 relevant tags for YouTube SEO
         
-        # Save script to file
+        Make it optimized for YouTube algorithm and high engagement.
+        Script preview: {script_preview}...
+        """
+
+class VideoRequest(BaseModel):
+    topic: str
+    duration_minutes: Optional[int] = 12
+
+class VoiceRequest(BaseModel):
+    script_id: Optional[str] = None
+
+class ThumbnailRequest(BaseModel):
+    topic: str = ""
+    script_id: Optional[str] = None
+
+class StockVideoRequest(BaseModel):
+    topic: str = ""
+    count: int = 10
+
+class MetadataRequest(BaseModel):
+    topic: str = ""
+    script_content: str = ""
+
+class AssembleVideoRequest(BaseModel):
+    script_id: Optional[str] = None
+    topic: str = ""
+
+class ScriptBatchRequest(BaseModel):
+    requests: List[VideoRequest]
+
+class VideoBatchRequest(BaseModel):
+    topics: List[str]
+    duration_minutes: Optional[int] = 12
+
+# Steps /api/test-all can run; voice always runs on the script generated in the same call
+TEST_SUITE_STEPS = ("script", "voice", "thumbnail", "stock", "metadata")
+
+class TestSuiteRequest(BaseModel):
+    suite: List[str] = list(TEST_SUITE_STEPS)
+    topic: str = "artificial intelligence in healthcare"
+    duration_minutes: Optional[int] = 5
+
+# Pexels video search results - only the fields we use are declared, the rest is skipped
+class PexelsVideoFile(BaseModel):
+    link: Optional[str] = None
+    quality: Optional[str] = None
+
+class PexelsUser(BaseModel):
+    name: Optional[str] = None
+
+class PexelsVideo(BaseModel):
+    id: int
+    duration: Optional[int] = None
+    tags: list = []
+    user: PexelsUser = PexelsUser()
+    video_files: List[PexelsVideoFile] = []
+    
+    def preferred_file(self) -> Optional[PexelsVideoFile]:
+        """The HD rendition when there is one, else the first file listed (files without a link are skipped)"""
+        files = [vf for vf in self.video_files if vf.link]
+        return next((vf for vf in files if vf.quality == 'hd'), files[0] if files else None)
+
+class PexelsVideoSearch(BaseModel):
+    videos: List[PexelsVideo] = []
+
+class VideoResponse(BaseModel):
+    video_id: str
+    status: str
+    message: str
+
+@app.get("/api/health")
+async def health_check():
+    return {"status": "healthy", "message": "AI YouTube Generator API is running"}
+
+# Upper bound on each integration probe so one slow service can't stall the report
+INTEGRATION_PROBE_TIMEOUT = 15
+
+async def _probe_openai():
+    """Check the OpenAI API with a tiny chat completion"""
+    async with openai_semaphore:
+        response = await async_openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Say 'OpenAI integration working!'"}],
+            max_tokens=10
+        )
+    return {"status": "success", "response": response.choices[0].message.content}
+
+async def _probe_elevenlabs():
+    """Check ElevenLabs with a short text-to-speech request"""
+    # Test text-to-speech instead of voices list (doesn't require voices_read permission)
+    audio = get_elevenlabs_client().text_to_speech.convert(
+        voice_id=VOICE_ID,
+        text="ElevenLabs integration test",
+        output_format="mp3_22050_32"
+    )
+    # Just check we get audio back without saving it
+    audio_bytes = 0
+    async with elevenlabs_semaphore:
+        async for chunk in audio:
+            audio_bytes += len(chunk)
+    return {"status": "success", "audio_bytes": audio_bytes}
+
+async def _probe_pexels():
+    """Check the Pexels API with a single-photo search"""
+    response = await pexels_get("/v1/search", params={"query": "test", "per_page": 1})
+    if response.status_code == 200:
+        return {"status": "success", "photos_found": len(orjson.loads(response.content).get("photos", []))}
+    return {"status": "error", "error": f"HTTP {response.status_code}"}
+
+@app.post("/api/test-integrations")
+async def test_ai_integrations():
+    """Test all AI service integrations"""
+    services = ("openai", "elevenlabs", "pexels")
+    
+    # Probe all services concurrently - total latency is the slowest probe, not the sum,
+    # and a hung service is cut off rather than holding the whole report
+    outcomes = await asyncio.gather(
+        asyncio.wait_for(_probe_openai(), INTEGRATION_PROBE_TIMEOUT),
+        asyncio.wait_for(_probe_elevenlabs(), INTEGRATION_PROBE_TIMEOUT),
+        asyncio.wait_for(_probe_pexels(), INTEGRATION_PROBE_TIMEOUT),
+        return_exceptions=True
+    )
+    
+    results = {}
+    for service, outcome in zip(services, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            results[service] = {"status": "error", "error": f"Timed out after {INTEGRATION_PROBE_TIMEOUT}s"}
+        elif isinstance(outcome, Exception):
+            results[service] = {"status": "error", "error": str(outcome)}
+        else:
+            results[service] = outcome
+    
+    return results
+
+async def stream_script(request: VideoRequest, script_path: str):
+    """Yield script text as it's generated, writing it to script_path (a cache hit yields it all at once)"""
+    # Calculate word target based on duration (approximately 150 words per minute)
+    word_target = max(150, request.duration_minutes * 150)
+    
+    prompt = SCRIPT_PROMPT_TEMPLATE.format(
+        topic=request.topic,
+        duration_minutes=request.duration_minutes,
+        word_target=word_target
+    )
+    
+    # Use different models based on content length for better performance
+    model = "gpt-4o-mini" if request.duration_minutes <= 5 else "gpt-4o"
+    max_tokens = min(4000, word_target + 500)  # Dynamic token limit
+    timeout = min(180, 30 + (request.duration_minutes * 10))  # Dynamic timeout
+    
+    # Repeat topics (including identical requests still in flight) reuse the cached
+    # script under a fresh script_id
+    cache_path = content_cache_path("script", "txt", normalize_topic(request.topic), request.duration_minutes, SCRIPT_PROMPT_VERSION)
+    if await lookup_or_claim(cache_path):
+        await asyncio.to_thread(restore_from_cache, cache_path, script_path)
+        async with aiofiles.open(script_path, 'r') as f:
+            yield await f.read()
+        return
+    
+    try:
+        # The slot is held while the completion streams, since that's when it's in flight
+        async with openai_semaphore:
+            stream = await async_openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=0.7,
+                timeout=timeout,
+                stream=True
+            )
+            
+            # Write the script to file as chunks arrive instead of after the full completion.
+            # Token deltas are only a few characters, so flush them in batches rather than
+            # paying an aiofiles thread hop per token.
+            pending = []
+            try:
+                async with aiofiles.open(script_path, 'w') as f:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            pending.append(delta)
+                            yield delta
+                            if len(pending) >= SCRIPT_WRITE_BATCH_DELTAS:
+                                await f.write("".join(pending))
+                                pending.clear()
+                    if pending:
+                        await f.write("".join(pending))
+            except BaseException:
+                # Don't leave a truncated script behind for voice generation to pick up
+                # (BaseException also covers a streaming client disconnecting mid-script)
+                if os.path.exists(script_path):
+                    os.remove(script_path)
+                raise
+        
+        await asyncio.to_thread(write_content_cache, script_path, cache_path)
+    finally:
+        release_generation(cache_path)
+
+@app.post("/api/generate-script")
+async def generate_script(request: VideoRequest):
+    """Generate a YouTube video script using OpenAI GPT-4"""
+    try:
+        script_id = uuid.uuid4().hex
         script_path = f"generated_content/scripts/{script_id}.txt"
-        async with aiofiles.open(script_path, 'w') as f:
-            await f.write(script_content)
+        
+        script_content = "".join([delta async for delta in stream_script(request, script_path)])
         
         return {
             "script_id": script_id,
@@ -186,51 +630,144 @@ async def generate_script(request: VideoRequest):
             "file_path": script_path
         }
         
-    except openai.APITimeoutError:
-        raise HTTPException(status_code=408, detail=f"Script generation timed out for {request.duration_minutes}-minute video. Try reducing the duration or simplifying the topic.")
-    except openai.APIError as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+    except openai.APIError:
+        raise  # Mapped to a 408/500 response by the app-level OpenAI handlers
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Script generation failed: {str(e)}")
 
+@app.post("/api/generate-script/stream")
+async def generate_script_stream(request: VideoRequest):
+    """Generate a script, forwarding it to the client as Server-Sent Events while it's written"""
+    script_id = uuid.uuid4().hex
+    script_path = f"generated_content/scripts/{script_id}.txt"
+    
+    async def event_stream():
+        yield b"data: " + orjson.dumps({"script_id": script_id}) + b"\n\n"
+        chunks = []
+        try:
+            async for delta in stream_script(request, script_path):
+                chunks.append(delta)
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            yield b"data: " + orjson.dumps({"error": f"Script generation failed: {str(e)}"}) + b"\n\n"
+            return
+        
+        script_content = "".join(chunks)
+        yield b"data: " + orjson.dumps({
+            "done": True,
+            "script_id": script_id,
+            "word_count": len(script_content.split()),
+            "estimated_duration": request.duration_minutes,
+            "file_path": script_path
+        }) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Largest number of scripts accepted in one batch request
+MAX_SCRIPT_BATCH = 20
+
+@app.post("/api/generate-scripts-batch")
+async def generate_scripts_batch(batch: ScriptBatchRequest):
+    """Generate several scripts concurrently; results keep the request order"""
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="requests must not be empty")
+    if len(batch.requests) > MAX_SCRIPT_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SCRIPT_BATCH} scripts per batch")
+    
+    # Each script still streams separately; openai_semaphore bounds the fan-out and
+    # duplicate topics in the batch share one generation through the content cache
+    outcomes = await asyncio.gather(
+        *(generate_script(request) for request in batch.requests),
+        return_exceptions=True
+    )
+    
+    results = []
+    for request, outcome in zip(batch.requests, outcomes):
+        if isinstance(outcome, HTTPException):
+            results.append({"topic": request.topic, "status": "error", "error": outcome.detail})
+        elif isinstance(outcome, Exception):
+            results.append({"topic": request.topic, "status": "error", "error": str(outcome)})
+        else:
+            results.append({"topic": request.topic, "status": "success", **outcome})
+    
+    return {"results": results}
+
+async def stream_narration(clean_script: str, audio_path: str):
+    """Stream ElevenLabs text-to-speech for a script into audio_path"""
+    audio_stream = get_elevenlabs_client().text_to_speech.convert(
+        voice_id=VOICE_ID,
+        optimize_streaming_latency=3,  # Max latency optimizations short of disabling text normalization
+        output_format="mp3_22050_32",
+        text=clean_script,
+        voice_settings=narration_voice_settings()
+    )
+    
+    # Write audio to disk as it streams in, batching the small TTS chunks so each
+    # aiofiles write (a thread-pool hop) moves up to 64 KiB
+    tmp_path = f"{audio_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        # The request is only sent once the stream is iterated, so gate the whole read
+        async with elevenlabs_semaphore, aiofiles.open(tmp_path, 'wb') as f:
+            buffer = bytearray()
+            async for chunk in audio_stream:
+                buffer += chunk
+                if len(buffer) >= AUDIO_WRITE_BATCH_BYTES:
+                    # The write has finished once awaited, so the buffer can be
+                    # handed over as-is and reused rather than copied to bytes
+                    await f.write(buffer)
+                    buffer.clear()
+            if buffer:
+                await f.write(buffer)
+        # Only a complete file replaces the audio video assembly will pick up
+        os.replace(tmp_path, audio_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 @app.post("/api/generate-voice")
-async def generate_voice(request: dict):
+async def generate_voice(request: VoiceRequest):
     """Convert script to voice using ElevenLabs"""
     try:
-        script_id = request.get("script_id")
+        script_id = request.script_id
         if not script_id:
             raise HTTPException(status_code=400, detail="script_id is required")
             
-        # Read script file
+        # Clean script for voice synthesis (remove markers), reusing the cleaned copy on retries
         script_path = f"generated_content/scripts/{script_id}.txt"
-        if not os.path.exists(script_path):
-            raise HTTPException(status_code=404, detail="Script not found")
-        
-        async with aiofiles.open(script_path, 'r') as f:
-            script_content = await f.read()
-        
-        # Clean script for voice synthesis (remove markers)
-        clean_script = script_content.replace('[TIMESTAMP:', '').replace('[PAUSE]', '... ').replace('[EMPHASIS]', '').replace(']', '')
-        
-        # Generate voice using ElevenLabs with text-to-speech
-        audio = elevenlabs_client.text_to_speech.convert(
-            voice_id="pNInz6obpgDQGcFmaJgB",  # Adam voice ID
-            optimize_streaming_latency="0",
-            output_format="mp3_22050_32",
-            text=clean_script,
-            voice_settings=VoiceSettings(
-                stability=0.71,
-                similarity_boost=0.5,
-                style=0.0,
-                use_speaker_boost=True
-            )
-        )
+        clean_path = f"generated_content/scripts/{script_id}.clean.txt"
+        try:
+            async with aiofiles.open(clean_path, 'r') as f:
+                clean_script = await f.read()
+        except FileNotFoundError:
+            try:
+                async with aiofiles.open(script_path, 'r') as f:
+                    clean_script = clean_script_for_voice(await f.read())
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Script not found")
+            async with aiofiles.open(clean_path, 'w') as f:
+                await f.write(clean_script)
         
-        # Save audio file
         audio_path = f"generated_content/audio/{script_id}.mp3"
-        with open(audio_path, 'wb') as f:
-            for chunk in audio:
-                f.write(chunk)
+        
+        # Identical narration text is only synthesised once
+        cache_path = content_cache_path("voice", "mp3", VOICE_ID, VOICE_SETTINGS_VERSION, clean_script)
+        if await lookup_or_claim(cache_path):
+            await asyncio.to_thread(restore_from_cache, cache_path, audio_path)
+            return {
+                "script_id": script_id,
+                "audio_path": audio_path,
+                "status": "success",
+                "cached": True
+            }
+        
+        try:
+            # Each attempt streams into its own temp file, so a retry after a dropped
+            # connection starts clean
+            await with_backoff(lambda: stream_narration(clean_script, audio_path))
+            await asyncio.to_thread(write_content_cache, audio_path, cache_path)
+        finally:
+            release_generation(cache_path)
         
         return {
             "script_id": script_id,
@@ -238,49 +775,37 @@ async def generate_voice(request: dict):
             "status": "success"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice generation failed: {str(e)}")
 
 @app.post("/api/generate-thumbnail")
-async def generate_thumbnail(request: dict):
+async def generate_thumbnail(request: ThumbnailRequest):
     """Generate thumbnail using DALL-E"""
+    # Key the thumbnail on its script so video assembly can find it directly
+    thumbnail = await create_thumbnail(request.topic, request.script_id or uuid.uuid4().hex)
+    if not request.script_id:
+        remember_unkeyed_thumbnail(thumbnail["image_path"])
+    return thumbnail
+
+async def create_thumbnail(topic: str, thumbnail_id: str) -> dict:
+    """Render (or restore from the cache) the thumbnail saved under thumbnail_id"""
     try:
-        topic = request.get("topic", "")
-        prompt = f"""
-        Create a highly engaging, professional YouTube thumbnail image for a video about "{topic}".
-        
-        CRITICAL REQUIREMENTS:
-        - NO TEXT OR WORDS in the image at all
-        - NO letters, numbers, or written content
-        - Focus on powerful visual imagery only
-        - Dramatic, cinematic composition
-        - High contrast and vibrant colors
-        - Professional photography style
-        - Should evoke strong emotion and curiosity
-        - Optimized for YouTube thumbnail format
-        - Dark, mysterious atmosphere if the topic is serious
-        - Bright, energetic if the topic is upbeat
-        
-        Style: Professional digital art, photorealistic, movie poster quality, no text overlay.
-        """
-        
-        response = openai_client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            size="1792x1024",
-            quality="standard",
-            n=1,
-        )
-        
-        # Download and save the image
-        image_url = response.data[0].url
-        thumbnail_id = str(uuid.uuid4())
-        
-        img_response = requests.get(image_url, timeout=30)
+        prompt = THUMBNAIL_PROMPT_TEMPLATE.format(topic=topic)
         thumbnail_path = f"generated_content/thumbnails/{thumbnail_id}.png"
         
-        with open(thumbnail_path, 'wb') as f:
-            f.write(img_response.content)
+        # Repeat topics reuse the cached image instead of another DALL-E render
+        cache_path = content_cache_path("thumbnail", "png", normalize_topic(topic), THUMBNAIL_PROMPT_VERSION)
+        if await lookup_or_claim(cache_path):
+            await asyncio.to_thread(restore_from_cache, cache_path, thumbnail_path)
+            image_url = f"/{thumbnail_path}"
+        else:
+            try:
+                image_url = await render_thumbnail(prompt, thumbnail_path)
+                await asyncio.to_thread(write_content_cache, thumbnail_path, cache_path)
+            finally:
+                release_generation(cache_path)
         
         return {
             "thumbnail_id": thumbnail_id,
@@ -288,136 +813,591 @@ async def generate_thumbnail(request: dict):
             "image_url": image_url
         }
         
-    except openai.APITimeoutError:
-        raise HTTPException(status_code=408, detail="Thumbnail generation timed out. Please try again.")
-    except openai.APIError as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+    except openai.APIError:
+        raise  # Mapped to a 408/500 response by the app-level OpenAI handlers
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Thumbnail generation failed: {str(e)}")
 
+async def render_thumbnail(prompt: str, thumbnail_path: str) -> str:
+    """Render a thumbnail with DALL-E, save it and return the source image URL"""
+    async with openai_semaphore:
+        response = await async_openai_client.images.generate(
+            model="dall-e-3",
+            prompt=prompt,
+            size="1792x1024",
+            quality="standard",
+            n=1,
+        )
+    
+    # Stream the image to a temp file, then swap it in (never writes through a cache hardlink)
+    image_url = response.data[0].url
+    tmp_path = f"{thumbnail_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        async with http_client.stream("GET", image_url, timeout=30) as img_response:
+            img_response.raise_for_status()
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                async for chunk in img_response.aiter_bytes(1 << 16):
+                    await f.write(chunk)
+        os.replace(tmp_path, thumbnail_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    return image_url
+
 @app.post("/api/get-stock-videos")
-async def get_stock_videos(request: dict):
+async def get_stock_videos(request: StockVideoRequest):
     """Get stock videos from Pexels"""
     try:
-        topic = request.get("topic", "")
-        count = request.get("count", 10)
-        
-        headers = {"Authorization": PEXELS_API_KEY}
+        topic = request.topic
+        count = request.count
         
         # Search for videos related to the topic
-        search_url = f"https://api.pexels.com/videos/search?query={topic}&per_page={count}&size=medium"
-        response = requests.get(search_url, headers=headers, timeout=30)
+        response = await search_pexels_videos(topic, count)
         
         if response.status_code != 200:
             raise HTTPException(status_code=500, detail=f"Pexels API error: {response.status_code}")
         
-        data = response.json()
+        search = PexelsVideoSearch.model_validate_json(response.content)
         videos = []
         
-        for video in data.get('videos', []):
+        for video in search.videos:
             # Get the medium quality video file
-            video_files = video.get('video_files', [])
-            medium_quality = next((vf for vf in video_files if vf.get('quality') == 'hd'), video_files[0] if video_files else None)
+            medium_quality = video.preferred_file()
             
             if medium_quality:
                 videos.append({
-                    "id": video['id'],
-                    "url": medium_quality['link'],
-                    "duration": video.get('duration', 0),
-                    "tags": video.get('tags', []),
-                    "user": video.get('user', {}).get('name', 'Unknown')
+                    "id": video.id,
+                    "url": medium_quality.link,
+                    "duration": video.duration or 0,
+                    "tags": video.tags,
+                    "user": video.user.name or "Unknown"
                 })
         
         return {"videos": videos, "total_found": len(videos)}
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Network error accessing Pexels: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stock video search failed: {str(e)}")
 
 @app.post("/api/generate-youtube-metadata")
-async def generate_youtube_metadata(request: dict):
+async def generate_youtube_metadata(request: MetadataRequest):
     """Generate YouTube title, description, and tags"""
     try:
-        topic = request.get("topic", "")
-        script_content = request.get("script_content", "")
-        
-        prompt = f"""
-        Create optimized YouTube metadata for a video about "{topic}".
-        
-        Generate:
-        1. 3 high-CTR title variations (60 characters max each)
-        2. A detailed description (200+ words) with:
-           - Engaging opening
-           - Key points covered
-           - Relevant hashtags
-           - Call to action
-        3. 10-15 relevant tags for YouTube SEO
-        
-        Make it optimized for YouTube algorithm and high engagement.
-        Script preview: {script_content[:200]}...
-        """
+        topic = request.topic
+        script_content = request.script_content
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800,
-            temperature=0.7,
-            timeout=30
-        )
+        prompt = METADATA_PROMPT_TEMPLATE.format(topic=topic, script_preview=script_content[:200])
+        model = "gpt-4o-mini"
         
-        metadata = response.choices[0].message.content
+        # The prompt fully determines the request, so an identical one reuses the stored answer
+        cache_path = content_cache_path("metadata", "txt", model, prompt, METADATA_PROMPT_VERSION)
+        if await lookup_or_claim(cache_path):
+            async with aiofiles.open(cache_path, 'r') as f:
+                metadata = await f.read()
+        else:
+            try:
+                async with openai_semaphore:
+                    response = await async_openai_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=800,
+                        temperature=0.7,
+                        timeout=30
+                    )
+                
+                metadata = response.choices[0].message.content
+                if metadata:
+                    await asyncio.to_thread(write_content_cache_text, metadata, cache_path)
+            finally:
+                release_generation(cache_path)
         
         return {
             "topic": topic,
             "metadata": metadata,
-            "generated_at": str(uuid.uuid4())
+            "generated_at": datetime.now(timezone.utc).isoformat()
         }
         
-    except openai.APITimeoutError:
-        raise HTTPException(status_code=408, detail="Metadata generation timed out. Please try again.")
-    except openai.APIError as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+    except openai.APIError:
+        raise  # Mapped to a 408/500 response by the app-level OpenAI handlers
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Metadata generation failed: {str(e)}")
 
-# Video processing status tracking - clear on startup
-video_status = {}
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Content cache hit/miss counts since startup"""
+    lookups = content_cache_stats["hits"] + content_cache_stats["misses"]
+    return {
+        **content_cache_stats,
+        "hit_rate": round(content_cache_stats["hits"] / lookups, 3) if lookups else None
+    }
+
+@app.post("/api/generate-video-pipeline")
+async def generate_video_pipeline(request: VideoRequest):
+    """Generate script, voice and thumbnail in a single call"""
+    async def script_then_voice():
+        script = await generate_script(request)
+        voice = await generate_voice(VoiceRequest(script_id=script["script_id"]))
+        return script, voice
+    
+    # The thumbnail only needs the topic, so DALL-E runs alongside script + voice generation.
+    # It goes to a temporary id (never tracked as the latest unkeyed thumbnail) until the
+    # script_id is known. Both branches run to completion so a failure on one side can't
+    # leave the other still writing.
+    script_and_voice, thumbnail = await asyncio.gather(
+        script_then_voice(),
+        create_thumbnail(request.topic, uuid.uuid4().hex),
+        return_exceptions=True
+    )
+    for outcome in (script_and_voice, thumbnail):
+        if isinstance(outcome, BaseException):
+            # Nothing will ever re-key the temporary thumbnail, so don't leave it on disk
+            if not isinstance(thumbnail, BaseException) and os.path.exists(thumbnail["image_path"]):
+                os.remove(thumbnail["image_path"])
+            raise outcome
+    script, voice = script_and_voice
+    
+    # The script_id wasn't known when the thumbnail started - re-key it now
+    script_id = script["script_id"]
+    thumbnail_path = f"generated_content/thumbnails/{script_id}.png"
+    os.replace(thumbnail["image_path"], thumbnail_path)
+    # Cache hits point image_url at the local file, which just moved
+    if thumbnail["image_url"] == f"/{thumbnail['image_path']}":
+        thumbnail["image_url"] = f"/{thumbnail_path}"
+    thumbnail.update({"thumbnail_id": script_id, "image_path": thumbnail_path})
+    
+    return {
+        "script_id": script_id,
+        "script": script,
+        "voice": voice,
+        "thumbnail": thumbnail
+    }
+
+# Largest number of topics accepted in one batch-generate request
+MAX_VIDEO_BATCH = 10
+
+@app.post("/api/batch-generate")
+async def batch_generate(batch: VideoBatchRequest):
+    """Run the pipeline for several topics and start each video's assembly; jobs keep the topic order"""
+    if not batch.topics:
+        raise HTTPException(status_code=400, detail="topics must not be empty")
+    if len(batch.topics) > MAX_VIDEO_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_VIDEO_BATCH} topics per batch")
+    
+    async def pipeline_then_assemble(topic: str):
+        pipeline = await generate_video_pipeline(VideoRequest(topic=topic, duration_minutes=batch.duration_minutes))
+        assembly = await assemble_video(AssembleVideoRequest(script_id=pipeline["script_id"], topic=topic))
+        return {"script_id": pipeline["script_id"], "video_id": assembly["video_id"]}
+    
+    # Topics are independent; the provider semaphores bound the fan-out and renders
+    # queue on the render pool, so clients only have to poll the returned video_ids
+    outcomes = await asyncio.gather(
+        *(pipeline_then_assemble(topic) for topic in batch.topics),
+        return_exceptions=True
+    )
+    
+    jobs = []
+    for topic, outcome in zip(batch.topics, outcomes):
+        if isinstance(outcome, HTTPException):
+            jobs.append({"topic": topic, "status": "error", "error": outcome.detail})
+        elif isinstance(outcome, Exception):
+            jobs.append({"topic": topic, "status": "error", "error": str(outcome)})
+        else:
+            jobs.append({"topic": topic, "status": "success", **outcome})
+    
+    return {"jobs": jobs}
+
+async def run_suite_step(call, summarize) -> dict:
+    """Run one /api/test-all step and reduce it to {status, id, details, error}"""
+    try:
+        result = await call
+    except HTTPException as e:
+        return {"status": "error", "id": None, "details": None, "error": e.detail}
+    except Exception as e:
+        return {"status": "error", "id": None, "details": None, "error": str(e)}
+    item_id, details = summarize(result)
+    return {"status": "success", "id": item_id, "details": details, "error": None}
+
+@app.post("/api/test-all")
+async def run_test_suite(request: TestSuiteRequest):
+    """Exercise the generation endpoints in one call, independent steps in parallel"""
+    unknown = set(request.suite) - set(TEST_SUITE_STEPS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown suite steps: {', '.join(sorted(unknown))}")
+    
+    topic = request.topic
+    steps = {}
+    
+    async def script_then_voice():
+        script = await run_suite_step(
+            generate_script(VideoRequest(topic=topic, duration_minutes=request.duration_minutes)),
+            lambda r: (r["script_id"], f"Words: {r.get('word_count', 0)}")
+        )
+        results = {"script": script}
+        if "voice" in request.suite:
+            if script["status"] == "success":
+                results["voice"] = await run_suite_step(
+                    generate_voice(VoiceRequest(script_id=script["id"])),
+                    lambda r: (r["script_id"], f"Audio: {r['audio_path']}")
+                )
+            else:
+                results["voice"] = {"status": "error", "id": None, "details": None, "error": "Script generation failed"}
+        return results
+    
+    if "script" in request.suite or "voice" in request.suite:
+        steps["chain"] = script_then_voice()
+    if "thumbnail" in request.suite:
+        # A throwaway id, so a test run never becomes the latest unkeyed thumbnail
+        # that assembly falls back to for legacy clients
+        steps["thumbnail"] = run_suite_step(
+            create_thumbnail(topic, uuid.uuid4().hex),
+            lambda r: (r["thumbnail_id"], f"Image: {r['image_path']}")
+        )
+    if "stock" in request.suite:
+        steps["stock"] = run_suite_step(
+            get_stock_videos(StockVideoRequest(topic=topic, count=5)),
+            lambda r: (None, f"Videos found: {r['total_found']}")
+        )
+    if "metadata" in request.suite:
+        steps["metadata"] = run_suite_step(
+            generate_youtube_metadata(MetadataRequest(topic=topic, script_content=f"A video about {topic}")),
+            lambda r: (r["generated_at"], f"Metadata generated: {r['generated_at']}")
+        )
+    
+    # Whole-call latency is the slowest step (script + voice), not the sum of them all
+    outcomes = dict(zip(steps, await asyncio.gather(*steps.values())))
+    results = outcomes.pop("chain", {})
+    results.update(outcomes)
+    return {name: results[name] for name in request.suite if name in results}
+
+# Bounded pool for background video rendering - extra jobs queue instead of
+# each request spawning its own thread (and its own ffmpeg processes)
+MAX_RENDERS = int(os.getenv("MAX_RENDERS", "2"))
+video_executor = ThreadPoolExecutor(max_workers=MAX_RENDERS, thread_name_prefix="video-render")
+
+# Submitted renders (running or queued) by video_id, dropped as they finish
+render_jobs = {}
+
+# Hardware H.264 encoders in order of preference, with the pixel format each accepts
+HARDWARE_ENCODERS = [
+    ("h264_nvenc", "yuv420p"),     # NVIDIA
+    ("h264_qsv", "nv12"),          # Intel Quick Sync
+    ("h264_v4l2m2m", "yuv420p"),   # ARM64 / Raspberry Pi
+]
+
+@lru_cache(maxsize=1)
+def detect_hardware_encoder() -> Optional[tuple]:
+    """Find a hardware H.264 encoder that actually works here (checked once, then cached)"""
+    try:
+        listing = subprocess.run(
+            ['/usr/bin/ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except Exception as e:
+        print(f"Could not list ffmpeg encoders: {e}")
+        return None
+    
+    for encoder, pix_fmt in HARDWARE_ENCODERS:
+        if encoder not in listing:
+            continue
+        # Being compiled in doesn't mean the device is present - try a one-frame encode
+        test_cmd = [
+            '/usr/bin/ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'color=c=black:s=1280x720:d=0.1',
+            '-frames:v', '1', '-c:v', encoder, '-pix_fmt', pix_fmt, '-f', 'null', '-'
+        ]
+        try:
+            if subprocess.run(test_cmd, capture_output=True, timeout=15).returncode == 0:
+                print(f"Using hardware encoder {encoder} for static videos")
+                return encoder, pix_fmt
+        except Exception:
+            continue
+    
+    print("No hardware H.264 encoder available, using libx264")
+    return None
+
+def static_video_command(thumbnail_path: str, audio_path: str, output_path: str, hardware_encoder: Optional[tuple]) -> list:
+    """FFmpeg command rendering the thumbnail over the narration, on hardware_encoder or libx264"""
+    if hardware_encoder:
+        encoder, pix_fmt = hardware_encoder
+        video_codec_args = ['-c:v', encoder, '-b:v', '2M']
+    else:
+        pix_fmt = 'yuv420p'
+        video_codec_args = [
+            '-c:v', 'libx264',     # Video codec
+            '-preset', 'fast',     # Faster encoding for ARM64
+            '-tune', 'stillimage', # Encoder tuning for a single static picture
+            '-crf', '28'           # Good quality/size balance
+        ]
+    
+    return [
+        '/usr/bin/ffmpeg', '-y',  # Overwrite output file (use full path)
+        '-loop', '1',    # Loop the image
+        '-framerate', '1',     # Read the still once per second instead of at output rate
+        '-i', thumbnail_path,  # Input image
+        '-i', audio_path,      # Input audio
+        *video_codec_args,
+        '-c:a', 'aac',         # Use AAC for better compatibility
+        '-r', '25',            # Standard frame rate for better playback
+        '-pix_fmt', pix_fmt,   # Compatible pixel format for the chosen encoder
+        '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2:color=black', # Better scaling with black padding
+        '-shortest',           # Stop when shortest stream ends
+        '-movflags', '+faststart', # Enable web streaming
+        '-max_muxing_queue_size', '1024', # Handle ARM64 processing delays
+        output_path
+    ]
+
+class VideoStatusCache(TTLCache):
+    """TTLCache that writes still-running entries to disk when they're evicted"""
+    
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for video_id, entry in expired:
+            self._persist_unfinished(video_id, entry)
+        return expired
+    
+    def popitem(self):
+        video_id, entry = super().popitem()
+        self._persist_unfinished(video_id, entry)
+        return video_id, entry
+    
+    @staticmethod
+    def _persist_unfinished(video_id: str, entry: dict):
+        # Final entries are already on disk; a queued or slow render must not turn into a 404
+        if entry.get("status") not in ("completed", "failed"):
+            save_status_file(video_id, entry)
+
+# Video processing status tracking - clear on startup. Bounded and expiring so
+# long-running servers don't accumulate every video ever rendered; evicted
+# entries are persisted to disk and reload from there.
+VIDEO_STATUS_MAX_ENTRIES = 10_000
+VIDEO_STATUS_TTL = 3600  # seconds since the entry was last updated
+video_status = VideoStatusCache(maxsize=VIDEO_STATUS_MAX_ENTRIES, ttl=VIDEO_STATUS_TTL)
+
+# Render threads and request handlers both update statuses; keep each update
+# (memory, subscribers, status file) in one piece so they can't interleave.
+# TTLCache also expires entries on reads, so lookups take the lock as well.
+video_status_lock = threading.RLock()
+
+# Most recent thumbnail generated without a script_id (legacy clients)
+latest_unkeyed_thumbnail = None
+
+def remember_unkeyed_thumbnail(thumbnail_path: str):
+    """Track the latest thumbnail that isn't keyed on a script_id"""
+    global latest_unkeyed_thumbnail
+    latest_unkeyed_thumbnail = thumbnail_path
+
+def newest_thumbnail() -> Optional[str]:
+    """Most recently written thumbnail on disk, if any"""
+    thumbnails = list(Path("generated_content/thumbnails").glob("*.png"))
+    return str(max(thumbnails, key=os.path.getctime)) if thumbnails else None
 
 def clear_video_status():
     """Clear all video status on startup - both memory and persistent files"""
-    global video_status
-    video_status = {}
+    with video_status_lock:
+        video_status.clear()
+    
+    # Also clear persistent status files that contain old errors (dirent scan, no globbing)
+    removed = 0
+    with os.scandir("generated_content/status") as entries:
+        for entry in entries:
+            if entry.name.endswith((".json", ".tmp")) and entry.is_file():
+                try:
+                    os.unlink(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+    
+    print(f"Video status cache cleared on startup: {removed} persistent files removed")
+
+# Event loop serving the API - status events are handed to it from worker threads
+main_loop = None
+
+# Live status subscribers: video_id -> set of asyncio.Queue receiving status snapshots
+status_subscribers = {}
+
+def subscribe_video_status(video_id: str) -> asyncio.Queue:
+    """Register a queue that receives every status update for a video"""
+    queue = asyncio.Queue()
+    status_subscribers.setdefault(video_id, set()).add(queue)
+    return queue
+
+def unsubscribe_video_status(video_id: str, queue: asyncio.Queue):
+    """Remove a status subscriber queue"""
+    queues = status_subscribers.get(video_id)
+    if queues:
+        queues.discard(queue)
+        if not queues:
+            status_subscribers.pop(video_id, None)
+
+def publish_video_status(video_id: str, status: dict):
+    """Push a status snapshot to live subscribers (safe to call from any thread)"""
+    queues = status_subscribers.get(video_id)
+    if not queues or main_loop is None:
+        return
     
-    # Also clear persistent status files that contain old errors
-    import os, glob
-    status_files = glob.glob("generated_content/status/*.json")
-    for file_path in status_files:
+    snapshot = dict(status)
+    for queue in list(queues):
         try:
-            os.remove(file_path)
-        except:
+            main_loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+        except RuntimeError:
+            # Event loop already closed (shutdown in progress)
             pass
-    
-    print(f"Video status cache cleared on startup: {len(status_files)} persistent files removed")
 
-def update_video_status(video_id: str, status: str, progress: int = 0, message: str = "", error: str = ""):
+@lru_cache(maxsize=1024)
+def status_file_path(video_id: str) -> str:
+    """Persistent status file for a video (polled repeatedly, so memoised)"""
+    return f"generated_content/status/{video_id}.json"
+
+def update_video_status(video_id: str, status: str, progress: int = 0, message: str = "", error: str = "", **details):
     """Update video processing status"""
-    video_status[video_id] = {
+    entry = {
         "status": status,  # "processing", "completed", "failed"
         "progress": progress,  # 0-100
         "message": message,
         "error": error,
-        "timestamp": time.time()
+        "timestamp": time.time(),
+        **details  # e.g. video_path, duration, file_size on completion
     }
     
-    # Also save to file for persistence
-    status_file = f"generated_content/status/{video_id}.json"
+    with video_status_lock:
+        video_status[video_id] = entry
+        publish_video_status(video_id, entry)
+        
+        # Progress ticks are pushed to live subscribers only; persist just the final outcome
+        # (VideoStatusCache writes unfinished entries if they're evicted)
+        if status in ("completed", "failed"):
+            save_status_file(video_id, entry)
+    
+    return entry
+
+def save_status_file(video_id: str, entry: dict):
+    """Persist a status entry - written aside and renamed into place so a concurrent
+    get_video_status never reads a half-written file"""
+    status_file = status_file_path(video_id)
+    tmp_file = f"{status_file}.{uuid.uuid4().hex}.tmp"
     try:
-        os.makedirs(os.path.dirname(status_file), exist_ok=True)
-        with open(status_file, 'w') as f:
-            json.dump(video_status[video_id], f)
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(entry))
+        os.replace(tmp_file, status_file)
     except Exception as e:
         print(f"Failed to save status: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+async def probe_media_duration(path: str) -> Optional[float]:
+    """Read a media file's duration with ffprobe without blocking the event loop"""
+    proc = await asyncio.create_subprocess_exec(
+        '/usr/bin/ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10)
+    except asyncio.TimeoutError:
+        proc.kill()
+        raise
+    
+    output = stdout.decode().strip()
+    return float(output) if output else None
+
+@lru_cache(maxsize=256)
+def probe_video_duration(path: str, size: int, mtime: float) -> Optional[float]:
+    """Duration of a rendered video, cached per (path, size, mtime) so unchanged files are probed once"""
+    # mvhd box first, then ffprobe reading only the first packet, then a full ffprobe scan
+    duration = mp4_duration(path)
+    if duration:
+        return duration
+    
+    for extra_args in (['-read_intervals', '%+#1'], []):
+        try:
+            result = subprocess.run(
+                ['/usr/bin/ffprobe', '-v', 'quiet', *extra_args,
+                 '-show_entries', 'format=duration:stream=duration',
+                 '-of', 'json', path],
+                capture_output=True, timeout=10
+            )
+            probe = orjson.loads(result.stdout or b"{}")
+        except Exception:
+            return None
+        
+        # Container duration when present, else the longest stream ("N/A" entries are skipped)
+        durations = [probe.get("format", {}).get("duration")]
+        if not durations[0]:
+            durations = [stream.get("duration") for stream in probe.get("streams", [])]
+        durations = [float(value) for value in durations if value and value != "N/A"]
+        if durations:
+            return max(durations)
+    return None
+
+# Cap simultaneous clip downloads across all renders so HD clips don't saturate the link
+CLIP_DOWNLOAD_CONCURRENCY = 8
+clip_download_semaphore = asyncio.Semaphore(CLIP_DOWNLOAD_CONCURRENCY)
+
+async def download_stock_clip(index: int, stock_video: dict, temp_video_dir: str) -> dict:
+    """Stream one stock clip to disk and measure its duration"""
+    clip_path = f"{temp_video_dir}/clip_{index}.mp4"
+    
+    async def fetch():
+        async with clip_download_semaphore:
+            async with http_client.stream("GET", stock_video['url'], timeout=60) as response:
+                response.raise_for_status()
+                async with aiofiles.open(clip_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(1 << 16):
+                        await f.write(chunk)
+    
+    # Opening with 'wb' truncates, so a retried download overwrites any partial clip
+    await with_backoff(fetch)
+    
+    # Get actual duration of downloaded clip (container header first, ffprobe as fallback)
+    try:
+        clip_duration = mp4_duration(clip_path) or await probe_media_duration(clip_path) or 10.0
+    except Exception:
+        clip_duration = min(stock_video.get('duration', 10), 20)  # Max 20 seconds per clip
+    
+    return {'path': clip_path, 'duration': clip_duration}
+
+async def download_stock_clips(stock_videos: list, temp_video_dir: str) -> list:
+    """Download all stock clips concurrently, skipping any that fail"""
+    results = await asyncio.gather(
+        *(download_stock_clip(i, stock_video, temp_video_dir) for i, stock_video in enumerate(stock_videos)),
+        return_exceptions=True
+    )
+    
+    downloaded_clips = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Error downloading clip {i}: {result}")
+            continue
+        print(f"Downloaded clip {i}: {result['duration']}s")
+        downloaded_clips.append(result)
+    
+    return downloaded_clips
+
+# Pexels clips that already match this can be concatenated without transcoding
+STREAM_COPY_CODECS = {"avc1", "avc3"}
+STREAM_COPY_PROFILES = {66, 77, 88, 100}  # 4:2:0 H.264 profiles (Baseline, Main, Extended, High)
+
+def clips_share_output_format(clips: list) -> bool:
+    """Check whether clips are identical H.264 1280x720 streams safe to concat with -c:v copy"""
+    # The concat demuxer keeps only the first clip's avcC and timescale, so clips must share both exactly
+    formats = [mp4_video_format(clip['path']) for clip in clips]
+    if not formats or any(fmt is None for fmt in formats):
+        return False
+    
+    first = formats[0]
+    return all(
+        fmt["codec"] in STREAM_COPY_CODECS
+        and fmt["profile"] in STREAM_COPY_PROFILES
+        and (fmt["width"], fmt["height"]) == (1280, 720)
+        and fmt["fps"] and fmt["fps"] == first["fps"]
+        and (fmt["codec"], fmt["profile"]) == (first["codec"], first["profile"])
+        and fmt["codec_config"] and fmt["codec_config"] == first["codec_config"]
+        and fmt["timescale"] == first["timescale"]
+        for fmt in formats
+    )
 
 def process_video_background(video_id: str, script_id: str, topic: str):
     """Background video processing function - creates actual MP4 video from thumbnail + audio"""
@@ -433,41 +1413,41 @@ def process_video_background(video_id: str, script_id: str, topic: str):
             update_video_status(video_id, "failed", 0, "", "Required files not found")
             return
         
-        # Find the corresponding thumbnail (same script_id pattern)
-        import glob
-        thumbnail_pattern = f"generated_content/thumbnails/*.png"
-        thumbnail_files = glob.glob(thumbnail_pattern)
+        # Find the thumbnail generated for this script
+        thumbnail_path = f"generated_content/thumbnails/{script_id}.png"
+        if not os.path.exists(thumbnail_path):
+            # Thumbnail was requested without a script_id - use the most recent one
+            thumbnail_path = latest_unkeyed_thumbnail
+            if not thumbnail_path or not os.path.exists(thumbnail_path):
+                # Nothing tracked since the last restart - fall back to the newest on disk
+                thumbnail_path = newest_thumbnail()
         
-        if not thumbnail_files:
+        if not thumbnail_path or not os.path.exists(thumbnail_path):
             update_video_status(video_id, "failed", 0, "", "No thumbnail found for video creation")
             return
         
-        # Use the most recent thumbnail
-        thumbnail_path = max(thumbnail_files, key=os.path.getctime)
-        
         update_video_status(video_id, "processing", 30, "Getting stock video clips...")
         
         # Get stock videos from Pexels for this topic
         stock_videos = []
         try:
-            import requests
-            headers = {"Authorization": os.environ.get('PEXELS_API_KEY')}
-            search_url = f"https://api.pexels.com/videos/search?query={topic}&per_page=5&size=medium"
-            response = requests.get(search_url, headers=headers, timeout=30)
+            # Reuse the pooled Pexels connection owned by the API event loop
+            response = asyncio.run_coroutine_threadsafe(
+                search_pexels_videos(topic, 5),
+                main_loop
+            ).result()
             
             if response.status_code == 200:
-                data = response.json()
-                for video in data.get('videos', [])[:3]:  # Get top 3 videos
-                    video_files = video.get('video_files', [])
+                search = PexelsVideoSearch.model_validate_json(response.content)
+                for video in search.videos[:3]:  # Get top 3 videos
                     # Get medium quality video
-                    medium_quality = next((vf for vf in video_files if vf.get('quality') == 'hd'), 
-                                        video_files[0] if video_files else None)
+                    medium_quality = video.preferred_file()
                     
-                    if medium_quality and medium_quality.get('link'):
+                    if medium_quality and medium_quality.link:
                         stock_videos.append({
-                            'url': medium_quality['link'],
-                            'duration': video.get('duration', 10),
-                            'id': video['id']
+                            'url': medium_quality.link,
+                            'duration': video.duration or 10,
+                            'id': video.id
                         })
                         
                 print(f"Found {len(stock_videos)} stock videos for topic: {topic}")
@@ -480,19 +1460,20 @@ def process_video_background(video_id: str, script_id: str, topic: str):
         
         update_video_status(video_id, "processing", 60, "Downloading and processing stock videos...")
         
-        # Get audio duration using a simple approach
-        try:
-            import subprocess
-            duration_cmd = ['/usr/bin/ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', 
-                          '-of', 'default=noprint_wrappers=1:nokey=1', audio_path]
-            print(f"Getting audio duration with command: {' '.join(duration_cmd)}")
-            duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, timeout=10, cwd="/app/backend")
-            print(f"FFprobe result: stdout='{duration_result.stdout}', stderr='{duration_result.stderr}', returncode={duration_result.returncode}")
-            audio_duration = float(duration_result.stdout.strip()) if duration_result.stdout.strip() else 60.0
-        except Exception as e:
-            print(f"Error getting audio duration: {e}")
-            # Fallback: assume reasonable duration
-            audio_duration = 60.0
+        # Get audio duration from the MP3 frame header, falling back to ffprobe
+        audio_duration = mp3_duration(audio_path)
+        if not audio_duration:
+            try:
+                duration_cmd = ['/usr/bin/ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', 
+                              '-of', 'default=noprint_wrappers=1:nokey=1', audio_path]
+                print(f"Getting audio duration with command: {' '.join(duration_cmd)}")
+                duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, timeout=10, cwd="/app/backend")
+                print(f"FFprobe result: stdout='{duration_result.stdout}', stderr='{duration_result.stderr}', returncode={duration_result.returncode}")
+                audio_duration = float(duration_result.stdout.strip()) if duration_result.stdout.strip() else 60.0
+            except Exception as e:
+                print(f"Error getting audio duration: {e}")
+                # Fallback: assume reasonable duration
+                audio_duration = 60.0
         
         print(f"Audio duration: {audio_duration} seconds")
         
@@ -510,44 +1491,11 @@ def process_video_background(video_id: str, script_id: str, topic: str):
                 print("Creating dynamic video with stock footage...")
                 update_video_status(video_id, "processing", 50, "Downloading stock video clips...")
                 
-                # Download stock video clips
-                downloaded_clips = []
-                total_clip_duration = 0
-                
-                for i, stock_video in enumerate(stock_videos):
-                    try:
-                        clip_path = f"{temp_video_dir}/clip_{i}.mp4"
-                        
-                        # Download the video clip
-                        import requests
-                        clip_response = requests.get(stock_video['url'], timeout=60)
-                        if clip_response.status_code == 200:
-                            with open(clip_path, 'wb') as f:
-                                f.write(clip_response.content)
-                            
-                            # Get actual duration of downloaded clip
-                            try:
-                                dur_cmd = ['/usr/bin/ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', 
-                                         '-of', 'default=noprint_wrappers=1:nokey=1', clip_path]
-                                dur_result = subprocess.run(dur_cmd, capture_output=True, text=True, timeout=10)
-                                clip_duration = float(dur_result.stdout.strip()) if dur_result.stdout.strip() else 10.0
-                            except:
-                                clip_duration = min(stock_video.get('duration', 10), 20)  # Max 20 seconds per clip
-                            
-                            downloaded_clips.append({
-                                'path': clip_path,
-                                'duration': clip_duration
-                            })
-                            total_clip_duration += clip_duration
-                            
-                            print(f"Downloaded clip {i}: {clip_duration}s")
-                            
-                            # Continue downloading all available clips (don't stop early)
-                            # We'll handle duration coverage later with looping if needed
-                                
-                    except Exception as e:
-                        print(f"Error downloading clip {i}: {e}")
-                        continue
+                # Download all stock clips concurrently on the API event loop
+                downloaded_clips = asyncio.run_coroutine_threadsafe(
+                    download_stock_clips(stock_videos, temp_video_dir), main_loop
+                ).result()
+                total_clip_duration = sum(clip['duration'] for clip in downloaded_clips)
                 
                 # Check if we have sufficient total duration
                 print(f"Total clip duration: {total_clip_duration}s, Audio duration: {audio_duration}s")
@@ -592,44 +1540,49 @@ def process_video_background(video_id: str, script_id: str, topic: str):
                             absolute_path = os.path.abspath(clip['path'])
                             f.write(f"file '{absolute_path}'\n")
                     
-                    # Re-encode clips to ensure compatibility and smooth concatenation
-                    print(f"Re-encoding {len(downloaded_clips)} clips for smooth concatenation...")
-                    reencoded_clips = []
-                    
-                    for i, clip in enumerate(downloaded_clips):
-                        reencoded_path = f"{temp_video_dir}/reencoded_clip_{i}.mp4"
-                        
-                        # Re-encode each clip to ensure consistent format, framerate, and codec
-                        reencode_cmd = [
-                            '/usr/bin/ffmpeg', '-y',
-                            '-i', clip['path'],
-                            '-c:v', 'libx264',
-                            '-c:a', 'aac',  
-                            '-r', '25',  # Consistent frame rate
-                            '-pix_fmt', 'yuv420p',  # Consistent pixel format
-                            '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2:color=black',
-                            '-preset', 'fast',
-                            '-crf', '28',
-                            '-avoid_negative_ts', 'make_zero',
-                            '-fflags', '+genpts',
-                            reencoded_path
-                        ]
+                    # Stream-copy when every clip is already H.264 1280x720 at the same frame rate
+                    if clips_share_output_format(downloaded_clips):
+                        print(f"All {len(downloaded_clips)} clips already match the output format, skipping re-encode...")
+                        reencoded_clips = downloaded_clips
+                    else:
+                        # Re-encode clips to ensure compatibility and smooth concatenation
+                        print(f"Re-encoding {len(downloaded_clips)} clips for smooth concatenation...")
+                        reencoded_clips = []
                         
-                        try:
-                            reencode_result = subprocess.run(reencode_cmd, capture_output=True, text=True, timeout=120)
-                            if reencode_result.returncode == 0 and os.path.exists(reencoded_path):
-                                reencoded_clips.append({
-                                    'path': reencoded_path,
-                                    'duration': clip['duration']
-                                })
-                                print(f"Re-encoded clip {i}: {clip['duration']}s")
-                            else:
-                                print(f"Failed to re-encode clip {i}: {reencode_result.stderr[:100]}...")
-                                # Use original clip as fallback
+                        for i, clip in enumerate(downloaded_clips):
+                            reencoded_path = f"{temp_video_dir}/reencoded_clip_{i}.mp4"
+                            
+                            # Re-encode each clip to ensure consistent format, framerate, and codec
+                            reencode_cmd = [
+                                '/usr/bin/ffmpeg', '-y',
+                                '-i', clip['path'],
+                                '-c:v', 'libx264',
+                                '-c:a', 'aac',  
+                                '-r', '25',  # Consistent frame rate
+                                '-pix_fmt', 'yuv420p',  # Consistent pixel format
+                                '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2:color=black',
+                                '-preset', 'fast',
+                                '-crf', '28',
+                                '-avoid_negative_ts', 'make_zero',
+                                '-fflags', '+genpts',
+                                reencoded_path
+                            ]
+                            
+                            try:
+                                reencode_result = subprocess.run(reencode_cmd, capture_output=True, text=True, timeout=120)
+                                if reencode_result.returncode == 0 and os.path.exists(reencoded_path):
+                                    reencoded_clips.append({
+                                        'path': reencoded_path,
+                                        'duration': clip['duration']
+                                    })
+                                    print(f"Re-encoded clip {i}: {clip['duration']}s")
+                                else:
+                                    print(f"Failed to re-encode clip {i}: {reencode_result.stderr[:100]}...")
+                                    # Use original clip as fallback
+                                    reencoded_clips.append(clip)
+                            except Exception as e:
+                                print(f"Error re-encoding clip {i}: {e}")
                                 reencoded_clips.append(clip)
-                        except Exception as e:
-                            print(f"Error re-encoding clip {i}: {e}")
-                            reencoded_clips.append(clip)
                     
                     # Create new clips list with re-encoded clips
                     reencoded_clips_list_path = f"{temp_video_dir}/reencoded_clips_list.txt"
@@ -645,7 +1598,9 @@ def process_video_background(video_id: str, script_id: str, topic: str):
                         '-safe', '0',
                         '-i', reencoded_clips_list_path,    # Re-encoded video clips
                         '-i', audio_path,                   # Audio track  
-                        '-c:v', 'copy',                     # Copy video (already re-encoded)
+                        '-map', '0:v:0',                    # Video from the clips only
+                        '-map', '1:a:0',                    # Narration is the only audio (stream-copied clips may carry their own)
+                        '-c:v', 'copy',                     # Copy video (already re-encoded or format-matched)
                         '-c:a', 'aac',                      # Audio codec
                         '-shortest',                        # Stop when shortest stream ends (let audio control duration)
                         '-movflags', '+faststart',          # Web streaming optimization
@@ -689,24 +1644,9 @@ def process_video_background(video_id: str, script_id: str, topic: str):
             print(f"Falling back to static video due to: {e}")
             update_video_status(video_id, "processing", 80, "Creating static video with thumbnail...")
             
-            # Create video using static thumbnail as fallback
-            ffmpeg_cmd = [
-                '/usr/bin/ffmpeg', '-y',  # Overwrite output file (use full path)
-                '-loop', '1',    # Loop the image
-                '-i', thumbnail_path,  # Input image
-                '-i', audio_path,      # Input audio
-                '-c:v', 'libx264',     # Video codec
-                '-c:a', 'aac',         # Use AAC for better compatibility
-                '-preset', 'fast',     # Faster encoding for ARM64
-                '-crf', '28',          # Good quality/size balance
-                '-r', '25',            # Standard frame rate for better playback
-                '-pix_fmt', 'yuv420p', # Compatible pixel format
-                '-vf', 'scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2:color=black', # Better scaling with black padding
-                '-shortest',           # Stop when shortest stream ends
-                '-movflags', '+faststart', # Enable web streaming
-                '-max_muxing_queue_size', '1024', # Handle ARM64 processing delays
-                output_path
-            ]
+            # Encode on the GPU/VPU when one is available, otherwise libx264 tuned for a still
+            hardware_encoder = detect_hardware_encoder()
+            ffmpeg_cmd = static_video_command(thumbnail_path, audio_path, output_path, hardware_encoder)
             
             update_video_status(video_id, "processing", 80, "Rendering final video...")
             
@@ -718,6 +1658,14 @@ def process_video_background(video_id: str, script_id: str, topic: str):
             # Run FFmpeg with extended timeout for ARM64 architecture (video processing needs more time)
             result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=600, cwd="/app/backend")  # 10 minutes
             
+            # The encoder was probed once at startup; the device can still fail mid-session
+            # (busy, out of sessions, driver reset), so give this render one go on the CPU
+            if result.returncode != 0 and hardware_encoder:
+                print(f"Hardware encoder {hardware_encoder[0]} failed, retrying with libx264: {result.stderr[-300:]}")
+                detect_hardware_encoder.cache_clear()  # re-probe before the next render
+                ffmpeg_cmd = static_video_command(thumbnail_path, audio_path, output_path, None)
+                result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=600, cwd="/app/backend")
+            
             print(f"DEBUG: FFmpeg completed with return code: {result.returncode}")
             if result.stdout:
                 print(f"DEBUG: FFmpeg stdout: {result.stdout[:500]}...")
@@ -744,14 +1692,15 @@ def process_video_background(video_id: str, script_id: str, topic: str):
         
         update_video_status(video_id, "processing", 95, "Finalizing video file...")
         
-        # Wait a moment for file system to sync
-        import time
-        time.sleep(2)
-        
+        # ffmpeg has exited and closed the output, so it is visible to stat/open right away
         # Check if video was created successfully
         try:
             print(f"DEBUG: Checking output file: {output_path}")
-            if not os.path.exists(output_path):
+            try:
+                output_stat = os.stat(output_path)  # existence and size in one syscall
+            except FileNotFoundError:
+                output_stat = None
+            if output_stat is None:
                 print(f"DEBUG: Output file does not exist: {output_path}")
                 # List what files ARE in the videos directory
                 videos_dir = "generated_content/videos"
@@ -761,7 +1710,7 @@ def process_video_background(video_id: str, script_id: str, topic: str):
                 update_video_status(video_id, "failed", 0, "", "Video file was not created")
                 return
                 
-            file_size = os.path.getsize(output_path)
+            file_size = output_stat.st_size
             print(f"DEBUG: Video file created successfully: {file_size} bytes")
             
             if file_size < 10000:  # If file is too small (less than 10KB), it probably failed
@@ -775,16 +1724,14 @@ def process_video_background(video_id: str, script_id: str, topic: str):
         
         print(f"Video creation successful, updating status to completed")
         
-        # Mark as completed
-        update_video_status(video_id, "completed", 100, "Video ready for download!")
-        
-        # Update final result
-        video_status[video_id].update({
-            "video_path": output_path,
-            "duration": audio_duration,
-            "file_size": file_size,
-            "clips_used": 1  # Using thumbnail as single "clip"
-        })
+        # Mark as completed with the final result
+        update_video_status(
+            video_id, "completed", 100, "Video ready for download!",
+            video_path=output_path,
+            duration=audio_duration,
+            file_size=file_size,
+            clips_used=1  # Using thumbnail as single "clip"
+        )
         
         print(f"Video creation completed successfully: {video_id}, size: {file_size} bytes, duration: {audio_duration}s")
         
@@ -795,28 +1742,28 @@ def process_video_background(video_id: str, script_id: str, topic: str):
         update_video_status(video_id, "failed", 0, "", f"Processing error: {str(e)}")
 
 @app.post("/api/assemble-video")
-async def assemble_video(request: dict):
+async def assemble_video(request: AssembleVideoRequest):
     """Start background video assembly"""
     try:
-        script_id = request.get("script_id")
-        topic = request.get("topic", "")
+        script_id = request.script_id
+        topic = request.topic
         
         if not script_id:
             raise HTTPException(status_code=400, detail="script_id is required")
         
         # Generate unique video ID
-        video_id = str(uuid.uuid4())
+        video_id = uuid.uuid4().hex
         
-        # Initialize status
-        update_video_status(video_id, "processing", 0, "Initializing video assembly...")
+        # Initialize status (tell the client when it has to wait for a render slot)
+        if len(render_jobs) >= MAX_RENDERS:
+            update_video_status(video_id, "processing", 0, f"Queued behind {len(render_jobs) - MAX_RENDERS + 1} other video(s)...")
+        else:
+            update_video_status(video_id, "processing", 0, "Initializing video assembly...")
         
-        # Start background processing
-        thread = threading.Thread(
-            target=process_video_background,
-            args=(video_id, script_id, topic),
-            daemon=True
-        )
-        thread.start()
+        # Start background processing on the render pool (fire-and-forget, tracked for cancellation)
+        job = video_executor.submit(process_video_background, video_id, script_id, topic)
+        render_jobs[video_id] = job
+        job.add_done_callback(lambda _: render_jobs.pop(video_id, None))
         
         return {
             "video_id": video_id,
@@ -828,110 +1775,232 @@ async def assemble_video(request: dict):
         print(f"Video assembly startup error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start video assembly: {str(e)}")
 
+@app.post("/api/cancel-video/{video_id}")
+async def cancel_video(video_id: str):
+    """Cancel a video that is still waiting for a render slot"""
+    job = render_jobs.get(video_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No queued render for this video")
+    
+    if not job.cancel():
+        raise HTTPException(status_code=409, detail="Video is already rendering and can't be cancelled")
+    
+    # Final states are persisted to disk, so write it from a worker thread
+    await asyncio.to_thread(update_video_status, video_id, "failed", 0, "", "Cancelled before rendering started")
+    return {"video_id": video_id, "status": "cancelled"}
+
+def status_etag(status: dict) -> str:
+    """Strong validator for a status snapshot - changes whenever the entry is rewritten"""
+    key = f"{status.get('status')}|{status.get('progress')}|{status.get('message')}|{status.get('timestamp')}"
+    return f'"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
 @app.get("/api/video-status/{video_id}")
-async def get_video_status(video_id: str):
+async def get_video_status(video_id: str, request: Request):
     """Get video processing status"""
     try:
         # Try to get from memory first
-        if video_id in video_status:
-            status = video_status[video_id]
-        else:
+        with video_status_lock:
+            status = video_status.get(video_id)
+        if status is None:
             # Try to load from file
-            status_file = f"generated_content/status/{video_id}.json"
-            if os.path.exists(status_file):
-                with open(status_file, 'r') as f:
-                    status = json.load(f)
-                    video_status[video_id] = status  # Cache in memory
-            else:
+            status_file = status_file_path(video_id)
+            try:
+                async with aiofiles.open(status_file, 'rb') as f:
+                    status = orjson.loads(await f.read())
+            except FileNotFoundError:
                 raise HTTPException(status_code=404, detail="Video not found")
+            with video_status_lock:
+                status = video_status.setdefault(video_id, status)  # Cache in memory
         
         # Check if video file exists but status shows processing/failed (recovery mechanism)
         if status.get("status") in ["processing", "failed"]:
             video_file = f"generated_content/videos/{video_id}.mp4"
-            if os.path.exists(video_file):
+            # One stat off the event loop gives both existence and size
+            try:
+                video_stat = await asyncio.to_thread(os.stat, video_file)
+            except FileNotFoundError:
+                video_stat = None
+            if video_stat:
                 try:
-                    file_size = os.path.getsize(video_file)
+                    file_size = video_stat.st_size
                     if file_size > 50000:  # File exists and is reasonable size (50KB+)
                         print(f"Recovering video status for {video_id} - file exists with size {file_size}")
                         
-                        # Get audio duration for better metadata
-                        try:
-                            import subprocess
-                            duration_cmd = ['/usr/bin/ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', 
-                                          '-of', 'default=noprint_wrappers=1:nokey=1', video_file]
-                            duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, timeout=10)
-                            video_duration = float(duration_result.stdout.strip()) if duration_result.stdout.strip() else None
-                        except:
-                            video_duration = None
+                        # Get video duration for better metadata, reusing it while the file is unchanged
+                        if status.get("probed_mtime") == video_stat.st_mtime and status.get("duration"):
+                            video_duration = status["duration"]
+                        else:
+                            video_duration = await asyncio.to_thread(
+                                probe_video_duration, video_file, file_size, video_stat.st_mtime
+                            )
                         
-                        # Update status to completed
-                        status.update({
-                            "status": "completed",
-                            "progress": 100,
-                            "message": "Video ready for download!",
-                            "file_size": file_size,
-                            "video_path": video_file,
-                            "duration": video_duration or status.get("duration", 60),
-                            "clips_used": 1
-                        })
-                        video_status[video_id] = status
-                        update_video_status(video_id, "completed", 100, "Video ready for download!")
-                        
-                        # Also update the persistent file data
-                        try:
-                            video_status[video_id].update({
-                                "file_size": file_size,
-                                "duration": video_duration or status.get("duration", 60)
-                            })
-                        except:
-                            pass
+                        # Update status to completed (memory, persistent file and live subscribers)
+                        status = await asyncio.to_thread(
+                            update_video_status,
+                            video_id, "completed", 100, "Video ready for download!",
+                            file_size=file_size,
+                            video_path=video_file,
+                            duration=video_duration or status.get("duration", 60),
+                            bit_rate=int(file_size * 8 / video_duration) if video_duration else None,
+                            probed_mtime=video_stat.st_mtime,
+                            clips_used=1
+                        )
                             
                 except Exception as e:
                     print(f"Error in status recovery: {e}")
         
-        return status
+        # Pollers send back the last ETag; unchanged progress costs a bodiless 304
+        etag = status_etag(status)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=orjson.dumps(status), media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
 
-@app.get("/api/download/{file_type}/{file_id}")
-async def download_file(file_type: str, file_id: str):
+@app.get("/api/video-status/{video_id}/stream")
+async def stream_video_status(video_id: str):
+    """Stream video processing status as Server-Sent Events until it completes or fails"""
+    # Subscribe before taking the snapshot so no update slips in between
+    queue = subscribe_video_status(video_id)
+    with video_status_lock:
+        status = video_status.get(video_id)
+    if status is None:
+        status_file = status_file_path(video_id)
+        try:
+            async with aiofiles.open(status_file, 'rb') as f:
+                status = orjson.loads(await f.read())
+        except FileNotFoundError:
+            unsubscribe_video_status(video_id, queue)
+            raise HTTPException(status_code=404, detail="Video not found")
+    
+    async def event_stream():
+        current = status
+        try:
+            while True:
+                yield b"data: " + orjson.dumps(current) + b"\n\n"
+                if current.get("status") in ("completed", "failed"):
+                    return
+                
+                # Comment lines keep proxies from closing an idle stream
+                while True:
+                    try:
+                        current = await asyncio.wait_for(queue.get(), timeout=15)
+                        break
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+        finally:
+            unsubscribe_video_status(video_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Single "bytes=start-end" range (either side may be omitted); multi-range requests get the full file
+BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def parse_byte_range(range_header: str, file_size: int) -> Optional[tuple]:
+    """Resolve a Range header to an inclusive (start, end), or None to serve the whole file.
+    Raises ValueError for ranges that can't be satisfied."""
+    match = BYTE_RANGE_RE.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    
+    start, end = match.group(1), match.group(2)
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0 or file_size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, file_size - length), file_size - 1
+    
+    start = int(start)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+async def iter_file_range(path: str, start: int, end: int, chunk_size: int = 1 << 16):
+    """Yield bytes start..end (inclusive) of a file"""
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+# Downloadable file types: where each one is stored and the media type it's served as
+DOWNLOAD_FILE_TYPES = {
+    "script": ("generated_content/scripts/{}.txt", "text/plain"),
+    "audio": ("generated_content/audio/{}.mp3", "audio/mpeg"),
+    "thumbnail": ("generated_content/thumbnails/{}.png", "image/png"),
+    "video": ("generated_content/videos/{}.mp4", "video/mp4")
+}
+
+# HEAD lets clients check type and size without pulling the file (FileResponse skips the body)
+@app.api_route("/api/download/{file_type}/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_type: str, file_id: str, request: Request):
     """Download generated files"""
     try:
-        file_paths = {
-            "script": f"generated_content/scripts/{file_id}.txt",
-            "audio": f"generated_content/audio/{file_id}.mp3", 
-            "thumbnail": f"generated_content/thumbnails/{file_id}.png",
-            "video": f"generated_content/videos/{file_id}.mp4"
-        }
-        
-        if file_type not in file_paths:
+        if file_type not in DOWNLOAD_FILE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid file type")
         
-        file_path = file_paths[file_type]
-        if not os.path.exists(file_path):
+        template, media_type = DOWNLOAD_FILE_TYPES[file_type]
+        file_path = template.format(file_id)
+        filename = os.path.basename(file_path)
+        # One stat answers existence and is handed to FileResponse so it doesn't stat again
+        try:
+            file_stat = await asyncio.to_thread(os.stat, file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found")
         
-        # For video files, set appropriate media type
-        if file_type == "video":
-            media_type = "video/mp4"
-            filename = f"{file_id}.mp4"
-        elif file_type == "audio":
-            media_type = "audio/mpeg"
-            filename = f"{file_id}.mp3"
-        elif file_type == "thumbnail":
-            media_type = "image/png"
-            filename = f"{file_id}.png"
-        else:
-            media_type = "text/plain"
-            filename = f"{file_id}.txt"
+        # Generated files never change in place, so size+mtime is a stable validator
+        etag = f'"{file_stat.st_size:x}-{int(file_stat.st_mtime):x}"'
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "public, max-age=3600",
+            "ETag": etag
+        }
+        
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        
+        # Resume support: honour a Range header unless If-Range says the file has changed
+        range_header = request.headers.get("range")
+        if range_header and request.method == "GET" and request.headers.get("if-range", etag) == etag:
+            try:
+                byte_range = parse_byte_range(range_header, file_stat.st_size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{file_stat.st_size}"})
+            
+            if byte_range:
+                start, end = byte_range
+                return StreamingResponse(
+                    iter_file_range(file_path, start, end),
+                    status_code=206,
+                    media_type=media_type,
+                    headers={
+                        **headers,
+                        "Content-Range": f"bytes {start}-{end}/{file_stat.st_size}",
+                        "Content-Length": str(end - start + 1),
+                        "Content-Disposition": f'attachment; filename="{filename}"'
+                    }
+                )
         
         return FileResponse(
             path=file_path,
             filename=filename,
-            media_type=media_type
+            media_type=media_type,
+            headers=headers,
+            stat_result=file_stat
         )
         
     except HTTPException:
@@ -941,5 +2010,19 @@ async def download_file(file_type: str, file_id: str):
         raise HTTPException(status_code=500, detail=f"File download failed: {str(e)}")
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # uvloop + httptools for a faster event loop and HTTP parser (uvloop has no Windows build).
+    # Render progress, live status subscribers and queued renders live in process memory,
+    # so extra workers only suit deployments that route a video's requests to one worker.
+    workers = int(os.getenv("WEB_WORKERS", "1"))
+    # Workers re-import the app by name, so point them at this file wherever it's launched from
+    uvicorn.run(
+        f"{Path(__file__).stem}:app" if workers > 1 else app,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=8001,
+        workers=workers,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools"
+    )
\ No newline at end of file
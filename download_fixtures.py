@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+TubeSmith test helpers - shared by the test scripts: result timestamps, and download
+summaries with an optional local fixture store
+
+Set TUBESMITH_TEST_CACHE=1 to record each successful download's status, headers,
+size and checksum under TUBESMITH_FIXTURE_DIR and replay them on later runs.
+Leave it unset (the default, and what CI should do) to always hit the backend.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+try:
+    import orjson
+except ImportError:  # backend/requirements.txt pins it; plain json still works
+    orjson = None
+
+# Connecting should be quick even when the backend is slow to answer, so requests use a
+# short connect timeout and a per-endpoint read timeout; a dead host fails in seconds
+CONNECT_TIMEOUT = 3.0
+
+# Rate limits and flaky gateways are retried with full-jitter backoff; the happy path never
+# sleeps. A 500 is final: the server has already retried its providers, and repeating a
+# generation or assembly request would only rerun (or queue a duplicate of) the same work.
+# For the same reason POSTs are never retried on a status code (see call_with_retry).
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_ATTEMPTS = 4
+RETRY_BACKOFF_BASE = 0.25  # seconds
+RETRY_BACKOFF_CAP = 8.0
+
+FIXTURE_CACHE_ENABLED = os.getenv("TUBESMITH_TEST_CACHE") == "1"
+FIXTURE_DIR = Path(os.getenv("TUBESMITH_FIXTURE_DIR", "/tmp/tubesmith_fixtures"))
+
+def retry_delay(attempt):
+    """Full-jitter backoff to wait after the given (0-based) failed attempt"""
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+def _retry_status(response, attempt, idempotent):
+    """Whether a response should be retried rather than returned"""
+    return idempotent and response.status_code in RETRY_STATUSES and attempt < RETRY_ATTEMPTS - 1
+
+def call_with_retry(send, retryable, on_retry=None, idempotent=True):
+    """Call send() for a response, retrying RETRY_STATUSES and exceptions retryable(e) accepts.
+
+    Status codes are only retried for idempotent requests (GET/HEAD): a POST that got a
+    gateway error may still be running on the server, and sending it again would start the
+    work twice. For those, retryable should only accept errors raised before the request
+    went out. The last attempt's response is returned (or its exception raised); a retried
+    response is closed first, and on_retry(reason, delay) is told about each retry."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            response = send()
+            if not _retry_status(response, attempt, idempotent):
+                return response
+            response.close()
+            reason = f"HTTP {response.status_code}"
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS - 1 or not retryable(e):
+                raise
+            reason = type(e).__name__
+        delay = retry_delay(attempt)
+        if on_retry is not None:
+            on_retry(reason, delay)
+        time.sleep(delay)
+
+async def call_with_retry_async(send, retryable, idempotent=True):
+    """call_with_retry for async clients: await send() for a response, with the same rules"""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            response = await send()
+            if not _retry_status(response, attempt, idempotent):
+                return response
+            await response.aclose()
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS - 1 or not retryable(e):
+                raise
+        await asyncio.sleep(retry_delay(attempt))
+
+def json_bytes(obj):
+    """Compact JSON encoding of obj, with orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+def dump_report(payload, path):
+    """Write a JSON results report, written aside and renamed so a crash never leaves a partial file.
+
+    Indented with orjson; the plain json fallback skips indentation since the file is machine-read."""
+    data = orjson.dumps(payload, option=orjson.OPT_INDENT_2) if orjson is not None else json_bytes(payload)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class RunClock:
+    """Stamps log entries with a monotonic offset; ISO timestamps are derived once at report time"""
+
+    def __init__(self):
+        self.started_wall = datetime.now()
+        self.started_mono = time.monotonic_ns()
+
+    def elapsed_ns(self):
+        """Monotonic nanoseconds since the run started"""
+        return time.monotonic_ns() - self.started_mono
+
+    def timestamp(self, ts_ns):
+        """ISO wall-clock time of an elapsed_ns() offset"""
+        return (self.started_wall + timedelta(microseconds=ts_ns // 1000)).isoformat()
+
+    def with_timestamps(self, results):
+        """Copies of logged results for the JSON report, each ts_ns turned into an ISO timestamp"""
+        report = []
+        for entry in results:
+            entry = dict(entry)
+            entry["timestamp"] = self.timestamp(entry.pop("ts_ns"))
+            report.append(entry)
+        return report
+
+def is_mp4_header(head):
+    """Whether a file's first 8 bytes are an MP4 ftyp box header.
+
+    The tag sits at offset 4 after a big-endian box size, which covers the size, tag, major
+    brand and minor version (16 bytes) plus 4 bytes per compatible brand."""
+    if len(head) < 8 or head[4:8] != b"ftyp":
+        return False
+    size = int.from_bytes(head[:4], "big")
+    return size >= 16 and size % 4 == 0
+
+def fixture_path(key):
+    """Sidecar file for a request key, named by its blake2b hash"""
+    return FIXTURE_DIR / f"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.json"
+
+def load_fixture(key):
+    """Recorded summary for key, or None when replay is off or nothing was recorded"""
+    path = fixture_path(key)
+    if FIXTURE_CACHE_ENABLED and path.exists():
+        return SimpleNamespace(**json.loads(path.read_text()))
+    return None
+
+def save_fixture(key, summary):
+    """Record a successful summary; a missing file isn't pinned as a 404"""
+    if FIXTURE_CACHE_ENABLED and summary["status_code"] == 200 and summary["body_len"] is not None:
+        FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+        fixture_path(key).write_text(json.dumps(summary))
+
+async def fetch_download(client, url, timeout=30):
+    """GET a download and summarise it as status_code/headers/body_len/body_sha256.
+
+    The body is streamed in 64 KiB chunks and only counted and hashed, never kept."""
+    recorded = load_fixture(url)
+    if recorded:
+        return recorded
+
+    async with client.stream("GET", url, timeout=timeout) as response:
+        body_len = None
+        digest = hashlib.sha256()
+        if response.status_code == 200:
+            body_len = 0
+            async for chunk in response.aiter_bytes(1 << 16):
+                body_len += len(chunk)
+                digest.update(chunk)
+
+    summary = {
+        "status_code": response.status_code,
+        "headers": dict(response.headers.items()),  # httpx lower-cases the names
+        "body_len": body_len,
+        "body_sha256": digest.hexdigest() if body_len is not None else None
+    }
+    save_fixture(url, summary)
+    return SimpleNamespace(**summary)
+
+async def probe_download(client, url, timeout=10):
+    """Get a download's status, headers and size without transferring the file.
+
+    Uses HEAD; a backend that rejects HEAD gets a one-byte Range GET instead, with the
+    size read from Content-Range. body_sha256 is always None here."""
+    key = f"HEAD {url}"
+    recorded = load_fixture(key)
+    if recorded:
+        return recorded
+
+    response = await client.head(url, timeout=timeout, follow_redirects=True)
+    status_code = response.status_code
+    body_len = response.headers.get("content-length")
+    if status_code == 405:
+        # Streamed so a server that ignores Range doesn't send us the whole file
+        async with client.stream("GET", url, timeout=timeout, headers={"Range": "bytes=0-0"}) as response:
+            status_code = 200 if response.status_code == 206 else response.status_code
+            if response.status_code == 206:
+                body_len = response.headers.get("content-range", "").rpartition("/")[2]
+            else:
+                body_len = response.headers.get("content-length")
+
+    summary = {
+        "status_code": status_code,
+        "headers": dict(response.headers.items()),
+        "body_len": int(body_len) if body_len and body_len.isdigit() else None,
+        "body_sha256": None
+    }
+    save_fixture(key, summary)
+    return SimpleNamespace(**summary)
@@ -4,15 +4,31 @@ TubeSmith Download Functionality - Focused Testing
 Tests all download endpoints as requested in the review
 """
 
-import requests
+import asyncio
+import httpx
+import importlib.util
 import sys
 from datetime import datetime
+from download_fixtures import fetch_download, probe_download
+
+# HTTP/2 multiplexes the concurrent tests over one TLS connection; needs the h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
 class DownloadTester:
     def __init__(self, base_url="https://42998885-3c1d-469d-bc1a-ade47f549193.preview.emergentagent.com"):
         self.base_url = base_url
         self.tests_run = 0
         self.tests_passed = 0
+        
+        # Shared keep-alive client, opened by run_all_tests
+        self.client = None
+
+    async def warm_up(self):
+        """Open the connection (DNS + TLS) before any test is timed; the response is discarded"""
+        try:
+            await self.client.get(f"{self.base_url}/api/health", timeout=5)
+        except httpx.HTTPError:
+            pass  # The tests themselves report an unreachable backend
 
     def log_test(self, name, success, details=""):
         """Log test results"""
@@ -30,7 +46,53 @@ class DownloadTester:
         print(result)
         return success
 
-    def test_download_endpoints(self):
+    async def _check_download(self, test_case):
+        """Download one test file and check its content type and size"""
+        print(f"\n📋 Testing: {test_case['description']}")
+        all_passed = True
+        
+        try:
+            # Streamed and only counted - videos can be hundreds of MB
+            response = await fetch_download(
+                self.client,
+                f"{self.base_url}/api/download/{test_case['file_type']}/{test_case['file_id']}"
+            )
+            
+            if response.status_code == 200:
+                # Check content type
+                content_type = response.headers.get('content-type', '')
+                content_length = response.body_len
+                
+                # Verify content type
+                ct_correct = test_case['expected_content_type'] in content_type
+                
+                # Verify reasonable file size
+                size_reasonable = content_length > 100
+                
+                # Check filename in content-disposition if present
+                content_disposition = response.headers.get('content-disposition', '')
+                filename_correct = test_case['expected_extension'] in content_disposition or content_disposition == ''
+                
+                if ct_correct and size_reasonable:
+                    details = f"✅ {content_length:,} bytes, Content-Type: {content_type}"
+                    success = self.log_test(f"{test_case['file_type'].title()} Download", True, details)
+                else:
+                    details = f"❌ Size: {content_length}, CT: {content_type}, Expected: {test_case['expected_content_type']}"
+                    success = self.log_test(f"{test_case['file_type'].title()} Download", False, details)
+                
+                all_passed = all_passed and success
+                
+            else:
+                success = self.log_test(f"{test_case['file_type'].title()} Download", False, f"HTTP {response.status_code}")
+                all_passed = False
+                
+        except Exception as e:
+            success = self.log_test(f"{test_case['file_type'].title()} Download", False, f"Error: {str(e)}")
+            all_passed = False
+        
+        return all_passed
+
+    async def test_download_endpoints(self):
         """Test all download endpoints as specified in review request"""
         print("🔍 Testing Download Endpoints (/api/download/{file_type}/{file_id})")
         print("=" * 70)
@@ -67,59 +129,18 @@ class DownloadTester:
             }
         ]
         
-        all_passed = True
-        
-        for test_case in test_cases:
-            print(f"\n📋 Testing: {test_case['description']}")
-            
-            try:
-                response = requests.get(
-                    f"{self.base_url}/api/download/{test_case['file_type']}/{test_case['file_id']}",
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    # Check content type
-                    content_type = response.headers.get('content-type', '')
-                    content_length = len(response.content)
-                    
-                    # Verify content type
-                    ct_correct = test_case['expected_content_type'] in content_type
-                    
-                    # Verify reasonable file size
-                    size_reasonable = content_length > 100
-                    
-                    # Check filename in content-disposition if present
-                    content_disposition = response.headers.get('content-disposition', '')
-                    filename_correct = test_case['expected_extension'] in content_disposition or content_disposition == ''
-                    
-                    if ct_correct and size_reasonable:
-                        details = f"✅ {content_length:,} bytes, Content-Type: {content_type}"
-                        success = self.log_test(f"{test_case['file_type'].title()} Download", True, details)
-                    else:
-                        details = f"❌ Size: {content_length}, CT: {content_type}, Expected: {test_case['expected_content_type']}"
-                        success = self.log_test(f"{test_case['file_type'].title()} Download", False, details)
-                    
-                    all_passed = all_passed and success
-                    
-                else:
-                    success = self.log_test(f"{test_case['file_type'].title()} Download", False, f"HTTP {response.status_code}")
-                    all_passed = False
-                    
-            except Exception as e:
-                success = self.log_test(f"{test_case['file_type'].title()} Download", False, f"Error: {str(e)}")
-                all_passed = False
-        
-        return all_passed
+        # The four downloads are independent, so fetch them side by side
+        results = await asyncio.gather(*(self._check_download(test_case) for test_case in test_cases))
+        return all(results)
 
-    def test_file_type_validation(self):
+    async def test_file_type_validation(self):
         """Test file type validation"""
         print(f"\n🔍 Testing File Type Validation")
         print("=" * 50)
         
         # Test invalid file type
         try:
-            response = requests.get(f"{self.base_url}/api/download/invalid/test-id", timeout=10)
+            response = await self.client.get(f"{self.base_url}/api/download/invalid/test-id", timeout=10)
             success = response.status_code == 400
             details = f"HTTP {response.status_code} (expected 400)"
             self.log_test("Invalid File Type Rejection", success, details)
@@ -128,14 +149,14 @@ class DownloadTester:
             self.log_test("Invalid File Type Rejection", False, f"Error: {str(e)}")
             return False
 
-    def test_file_access_validation(self):
+    async def test_file_access_validation(self):
         """Test file access validation"""
         print(f"\n🔍 Testing File Access Validation")
         print("=" * 50)
         
         # Test non-existent file
         try:
-            response = requests.get(f"{self.base_url}/api/download/script/non-existent-file-id", timeout=10)
+            response = await self.client.get(f"{self.base_url}/api/download/script/non-existent-file-id", timeout=10)
             success = response.status_code == 404
             details = f"HTTP {response.status_code} (expected 404)"
             self.log_test("Non-existent File Handling", success, details)
@@ -144,7 +165,30 @@ class DownloadTester:
             self.log_test("Non-existent File Handling", False, f"Error: {str(e)}")
             return False
 
-    def test_content_types(self):
+    async def _check_content_type(self, file_type, file_id, expected_ct):
+        """Check the Content-Type header of one download"""
+        all_passed = True
+        try:
+            # Only the headers matter here, so don't transfer the file at all
+            response = await probe_download(self.client, f"{self.base_url}/api/download/{file_type}/{file_id}")
+            
+            if response.status_code == 200:
+                actual_ct = response.headers.get('content-type', '')
+                success = expected_ct in actual_ct
+                details = f"Expected: {expected_ct}, Got: {actual_ct}"
+                self.log_test(f"{file_type.title()} Content-Type", success, details)
+                all_passed = all_passed and success
+            else:
+                self.log_test(f"{file_type.title()} Content-Type", False, f"HTTP {response.status_code}")
+                all_passed = False
+                
+        except Exception as e:
+            self.log_test(f"{file_type.title()} Content-Type", False, f"Error: {str(e)}")
+            all_passed = False
+        
+        return all_passed
+
+    async def test_content_types(self):
         """Test content types are correct"""
         print(f"\n🔍 Testing Content Types")
         print("=" * 50)
@@ -156,39 +200,26 @@ class DownloadTester:
             ("video", "237bd775-0fe5-4a66-b8f4-e89c3dc56c11", "video/mp4")
         ]
         
-        all_passed = True
-        
-        for file_type, file_id, expected_ct in content_type_tests:
-            try:
-                response = requests.get(f"{self.base_url}/api/download/{file_type}/{file_id}", timeout=30)
-                
-                if response.status_code == 200:
-                    actual_ct = response.headers.get('content-type', '')
-                    success = expected_ct in actual_ct
-                    details = f"Expected: {expected_ct}, Got: {actual_ct}"
-                    self.log_test(f"{file_type.title()} Content-Type", success, details)
-                    all_passed = all_passed and success
-                else:
-                    self.log_test(f"{file_type.title()} Content-Type", False, f"HTTP {response.status_code}")
-                    all_passed = False
-                    
-            except Exception as e:
-                self.log_test(f"{file_type.title()} Content-Type", False, f"Error: {str(e)}")
-                all_passed = False
-        
-        return all_passed
+        results = await asyncio.gather(*(self._check_content_type(*test) for test in content_type_tests))
+        return all(results)
 
-    def run_all_tests(self):
+    async def run_all_tests(self):
         """Run all download functionality tests"""
         print("🚀 TubeSmith Download Functionality Testing")
         print(f"🌐 Testing against: {self.base_url}")
         print("=" * 80)
         
-        # Run all test categories
-        test1 = self.test_download_endpoints()
-        test2 = self.test_file_type_validation() 
-        test3 = self.test_file_access_validation()
-        test4 = self.test_content_types()
+        # Test categories don't depend on each other, so run them concurrently
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=30, limits=limits) as client:
+            self.client = client
+            await self.warm_up()
+            await asyncio.gather(
+                self.test_download_endpoints(),
+                self.test_file_type_validation(),
+                self.test_file_access_validation(),
+                self.test_content_types()
+            )
         
         # Print summary
         print("\n" + "=" * 80)
@@ -204,7 +235,7 @@ class DownloadTester:
 def main():
     """Main test execution"""
     tester = DownloadTester()
-    success = tester.run_all_tests()
+    success = asyncio.run(tester.run_all_tests())
     return 0 if success else 1
 
 if __name__ == "__main__":
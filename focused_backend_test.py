@@ -5,48 +5,123 @@ Tests specific endpoints mentioned in the review with focus on timeout issues
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
 import json
+import hashlib
+import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from download_fixtures import CONNECT_TIMEOUT, RunClock, dump_report
+
+# Health and integration probes are cached on disk for a minute so quick re-runs don't
+# fan out to OpenAI/ElevenLabs/Pexels again; TUBESMITH_NO_CACHE=1 always hits the backend
+PROBE_CACHE_ENABLED = os.getenv("TUBESMITH_NO_CACHE") != "1"
+PROBE_CACHE_PATH = "/tmp/tubesmith_probe_cache.json"
+PROBE_CACHE_TTL = 60
+_cache_lock = threading.Lock()
+
+def _cache_key(url, payload=None):
+    """Cache key for a request URL and JSON body"""
+    return hashlib.sha1(f"{url}|{json.dumps(payload, sort_keys=True)}".encode()).hexdigest()
+
+def _load_cache():
+    """Whole probe cache; a missing or unreadable file is an empty cache"""
+    try:
+        with open(PROBE_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _cache_get(key):
+    """Cached value for key, or None if it is missing or older than its TTL"""
+    entry = _load_cache().get(key)
+    if entry and time.time() - entry["stored_at"] <= entry["ttl"]:
+        return entry["value"]
+    return None
+
+def _cache_put(key, value, ttl=PROBE_CACHE_TTL):
+    """Store value under key, dropping expired entries; the file is swapped in atomically"""
+    with _cache_lock:
+        now = time.time()
+        cache = {k: e for k, e in _load_cache().items() if now - e["stored_at"] <= e["ttl"]}
+        cache[key] = {"stored_at": now, "ttl": ttl, "value": value}
+        tmp_path = f"{PROBE_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, PROBE_CACHE_PATH)
 
 class FocusedTubeSmithTester:
     def __init__(self, base_url="https://42998885-3c1d-469d-bc1a-ade47f549193.preview.emergentagent.com"):
         self.base_url = base_url
+        
+        # One keep-alive session so the suite pays the TLS handshake once, not per call.
+        # Gateway errors get two quick retries (urllib3 only retries idempotent methods).
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        # Threads wait for a pooled connection when all are busy rather than opening
+        # throwaway extras (urllib3's "Connection pool is full" warning)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry,
+                              pool_block=True)
+        # Both schemes, so a local http:// backend gets the same pooling and retries
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.results = []
+        self.results_lock = threading.Lock()  # tests log from worker threads
+        self.script_id = None  # set by the script test, reused by the thumbnail test
+        self.clock = RunClock()
 
     def log_result(self, test_name, success, details, duration=None):
         """Log test results with timing"""
         status = "✅ PASS" if success else "❌ FAIL"
         duration_str = f" ({duration:.2f}s)" if duration else ""
-        result = f"{status} - {test_name}{duration_str}"
-        if details:
-            result += f" | {details}"
-        print(result)
-        
-        self.results.append({
-            "test": test_name,
-            "success": success,
-            "details": details,
-            "duration": duration,
-            "timestamp": datetime.now().isoformat()
-        })
+        result = " | ".join(filter(None, [f"{status} - {test_name}{duration_str}", details]))
+        with self.results_lock:
+            print(result)
+            self.results.append({
+                "test": test_name,
+                "success": success,
+                "details": details,
+                "duration": duration,
+                "ts_ns": self.clock.elapsed_ns()
+            })
         return success
 
+    def _cached_probe(self, method, url, timeout):
+        """Send a probe request, or replay a recent 200 from the probe cache.
+
+        Returns (status_code, json_data, cached)."""
+        key = _cache_key(url)
+        if PROBE_CACHE_ENABLED:
+            hit = _cache_get(key)
+            if hit is not None:
+                return hit["status_code"], hit["data"], True
+        
+        response = self.session.request(method, url, timeout=timeout)
+        data = response.json() if response.status_code == 200 else None
+        if PROBE_CACHE_ENABLED and response.status_code == 200:
+            _cache_put(key, {"status_code": response.status_code, "data": data})
+        return response.status_code, data, False
+
     def test_health_check(self):
         """Test 1: Health check endpoint (/api/health)"""
         print("\n🏥 Testing Health Check Endpoint...")
         start_time = time.time()
         try:
-            response = requests.get(f"{self.base_url}/api/health", timeout=10)
-            duration = time.time() - start_time
+            status_code, data, cached = self._cached_probe("GET", f"{self.base_url}/api/health", timeout=(CONNECT_TIMEOUT, 10))
+            duration = 0.0 if cached else time.time() - start_time
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 details = f"Status: {data.get('status')}, Message: {data.get('message')}"
+                if cached:
+                    details += " (cached)"
                 return self.log_result("Health Check", True, details, duration)
             else:
-                return self.log_result("Health Check", False, f"HTTP {response.status_code}", duration)
+                return self.log_result("Health Check", False, f"HTTP {status_code}", duration)
                 
         except Exception as e:
             duration = time.time() - start_time
@@ -57,34 +132,35 @@ class FocusedTubeSmithTester:
         print("\n🤖 Testing AI Integrations Endpoint...")
         start_time = time.time()
         try:
-            response = requests.post(f"{self.base_url}/api/test-integrations", 
-                                   headers={'Content-Type': 'application/json'}, 
-                                   timeout=30)
-            duration = time.time() - start_time
+            status_code, data, cached = self._cached_probe("POST", f"{self.base_url}/api/test-integrations",
+                                                           timeout=(CONNECT_TIMEOUT, 30))
+            duration = 0.0 if cached else time.time() - start_time
             
-            if response.status_code == 200:
-                data = response.json()
-                
+            if status_code == 200:
                 # Check each service individually
-                openai_status = data.get('openai', {}).get('status', 'unknown')
-                elevenlabs_status = data.get('elevenlabs', {}).get('status', 'unknown')
-                pexels_status = data.get('pexels', {}).get('status', 'unknown')
+                openai = data.get('openai') or {}
+                elevenlabs = data.get('elevenlabs') or {}
+                pexels = data.get('pexels') or {}
+                openai_status = openai.get('status', 'unknown')
+                elevenlabs_status = elevenlabs.get('status', 'unknown')
+                pexels_status = pexels.get('status', 'unknown')
                 
                 # Log individual services
                 self.log_result("OpenAI Integration", openai_status == 'success', 
-                              data.get('openai', {}).get('response', data.get('openai', {}).get('error', 'Unknown')))
+                              openai.get('response', openai.get('error', 'Unknown')))
                 
-                elevenlabs_error = data.get('elevenlabs', {}).get('error', 'Working')
-                self.log_result("ElevenLabs Integration", elevenlabs_status == 'success', elevenlabs_error)
+                self.log_result("ElevenLabs Integration", elevenlabs_status == 'success', elevenlabs.get('error', 'Working'))
                 
                 self.log_result("Pexels Integration", pexels_status == 'success',
-                              f"Photos found: {data.get('pexels', {}).get('photos_found', 0)}")
+                              f"Photos found: {pexels.get('photos_found', 0)}")
                 
                 overall_success = openai_status == 'success' and pexels_status == 'success'
                 details = f"OpenAI: {openai_status}, ElevenLabs: {elevenlabs_status}, Pexels: {pexels_status}"
+                if cached:
+                    details += " (cached)"
                 return self.log_result("AI Integrations Overall", overall_success, details, duration)
             else:
-                return self.log_result("AI Integrations", False, f"HTTP {response.status_code}", duration)
+                return self.log_result("AI Integrations", False, f"HTTP {status_code}", duration)
                 
         except Exception as e:
             duration = time.time() - start_time
@@ -105,10 +181,9 @@ class FocusedTubeSmithTester:
             print(f"   Duration: {payload['duration_minutes']} minutes")
             print("   Monitoring for timeout issues...")
             
-            response = requests.post(f"{self.base_url}/api/generate-script",
-                                   json=payload,
-                                   headers={'Content-Type': 'application/json'},
-                                   timeout=90)  # 90 second timeout as mentioned in review
+            response = self.session.post(f"{self.base_url}/api/generate-script",
+                                       json=payload,
+                                       timeout=(CONNECT_TIMEOUT, 90))  # 90 second timeout as mentioned in review
             duration = time.time() - start_time
             
             if response.status_code == 200:
@@ -136,17 +211,18 @@ class FocusedTubeSmithTester:
         """Test 4: Thumbnail generation if script generation works"""
         print("\n🖼️  Testing Thumbnail Generation...")
         
-        if not hasattr(self, 'script_id'):
+        if not self.script_id:
             return self.log_result("Thumbnail Generation", False, "Skipped - Script generation failed")
         
         start_time = time.time()
         try:
-            payload = {"topic": "space exploration"}
+            # The prompt is built from the topic; the script_id keys the image on its script
+            # (as video assembly expects) instead of leaving it as an unkeyed thumbnail
+            payload = {"topic": "space exploration", "script_id": self.script_id}
             
-            response = requests.post(f"{self.base_url}/api/generate-thumbnail",
-                                   json=payload,
-                                   headers={'Content-Type': 'application/json'},
-                                   timeout=60)
+            response = self.session.post(f"{self.base_url}/api/generate-thumbnail",
+                                       json=payload,
+                                       timeout=(CONNECT_TIMEOUT, 60))
             duration = time.time() - start_time
             
             if response.status_code == 200:
@@ -174,10 +250,9 @@ class FocusedTubeSmithTester:
         try:
             payload = {"topic": "space exploration", "count": 8}
             
-            response = requests.post(f"{self.base_url}/api/get-stock-videos",
-                                   json=payload,
-                                   headers={'Content-Type': 'application/json'},
-                                   timeout=30)
+            response = self.session.post(f"{self.base_url}/api/get-stock-videos",
+                                       json=payload,
+                                       timeout=(CONNECT_TIMEOUT, 30))
             duration = time.time() - start_time
             
             if response.status_code == 200:
@@ -206,24 +281,26 @@ class FocusedTubeSmithTester:
         print(f"🌐 Testing against: {self.base_url}")
         print("=" * 70)
         
-        # Run tests in the order specified in the review
-        tests_passed = 0
         total_tests = 5
         
-        if self.test_health_check():
-            tests_passed += 1
-            
-        if self.test_ai_integrations():
-            tests_passed += 1
-            
-        if self.test_script_generation_timeout_focus():
-            tests_passed += 1
-            
-        if self.test_thumbnail_generation_if_script_works():
-            tests_passed += 1
-            
-        if self.test_stock_video_search():
-            tests_passed += 1
+        def script_then_thumbnail():
+            """The thumbnail test only runs once script generation has finished"""
+            return [self.test_script_generation_timeout_focus(), self.test_thumbnail_generation_if_script_works()]
+        
+        # Everything else is independent, so the tests share a small thread pool and the
+        # wall time is the slowest branch rather than the sum of every request
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(self.test_health_check),
+                executor.submit(self.test_ai_integrations),
+                executor.submit(self.test_stock_video_search),
+                executor.submit(script_then_thumbnail)
+            ]
+            outcomes = []
+            for future in futures:
+                result = future.result()
+                outcomes.extend(result if isinstance(result, list) else [result])
+        tests_passed = sum(1 for passed in outcomes if passed)
         
         # Summary
         print("\n" + "=" * 70)
@@ -240,17 +317,20 @@ class FocusedTubeSmithTester:
 def main():
     """Main execution"""
     tester = FocusedTubeSmithTester()
-    success = tester.run_focused_tests()
+    try:
+        success = tester.run_focused_tests()
+    finally:
+        tester.session.close()
     
     # Save results
-    with open('/app/focused_test_results.json', 'w') as f:
-        json.dump({
-            "test_type": "focused_backend_review",
-            "timestamp": datetime.now().isoformat(),
-            "focus": "timeout_issues_and_api_compatibility",
-            "results": tester.results,
-            "overall_success": success
-        }, f, indent=2)
+    payload = {
+        "test_type": "focused_backend_review",
+        "timestamp": datetime.now().isoformat(),
+        "focus": "timeout_issues_and_api_compatibility",
+        "results": tester.clock.with_timestamps(tester.results),
+        "overall_success": success
+    }
+    dump_report(payload, '/app/focused_test_results.json')
     
     return 0 if success else 1
 